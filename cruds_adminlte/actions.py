@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import six
+
+from django.utils.translation import ugettext_lazy as _
+
+
+class ListAction(object):
+    """
+    Action applied to the rows checked in the list view, all of them in
+    one query. ``permission`` is the CRUDView perms entry the user needs
+    ('create', 'update', 'delete'...), checked once for the whole action,
+    the view of that name must be in ``views_available``.
+    """
+    name = None
+    label = None
+    permission = 'update'
+    css_class = 'btn-default'
+
+    def __init__(self, name=None, label=None, permission=None):
+        if name:
+            self.name = name
+        if label:
+            self.label = label
+        if permission:
+            self.permission = permission
+
+    def has_perm(self, view, user):
+        """
+        Actions of views not available, or without perms entry, are never
+        allowed.
+        """
+        if self.permission not in view.views_available:
+            return False
+        if not view.check_perms:
+            return True
+        if self.permission not in view.all_perms:
+            return False
+        return all(view.validate_user_perms(user, perm, self.permission)
+                   for perm in view.all_perms[self.permission])
+
+    def execute(self, view, queryset):
+        """
+        Runs the action over queryset, returns the number of rows changed.
+        """
+        raise NotImplementedError
+
+
+class BulkDeleteAction(ListAction):
+    name = 'delete'
+    label = _('Delete selected')
+    permission = 'delete'
+    css_class = 'btn-danger'
+
+    def execute(self, view, queryset):
+        deleted, rows = queryset.delete()
+        return rows.get(view.model._meta.label, 0)
+
+
+class BulkUpdateAction(ListAction):
+    """
+    Sets ``values`` in the checked rows, for example::
+
+        BulkUpdateAction('mark_paid', _('Mark as paid'), paid=True)
+    """
+
+    def __init__(self, name=None, label=None, permission=None, **values):
+        super(BulkUpdateAction, self).__init__(name, label, permission)
+        self.values = values
+
+    def execute(self, view, queryset):
+        return queryset.update(**self.values)
+
+
+BUILTIN_ACTIONS = {
+    'delete': BulkDeleteAction,
+}
+
+
+def get_list_actions(list_actions):
+    """
+    Returns a list of ListAction instances, built-in actions can be given
+    by name.
+    """
+    actions = []
+    for action in list_actions or []:
+        if isinstance(action, six.string_types):
+            action = BUILTIN_ACTIONS[action]()
+        elif isinstance(action, type):
+            action = action()
+        actions.append(action)
+    return actions
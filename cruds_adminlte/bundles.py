@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Static bundles of the CRUD pages. ``manage.py cruds_build_bundles`` joins
+the files of every bundle in one minified, content hashed file (plus gzip
+and brotli siblings) under ``STATIC_ROOT/cruds_bundles``, the
+``crud_bundles`` tag links the bundles a page needs, or the source files
+while bundles are not built.
+"""
+from __future__ import unicode_literals
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+from collections import OrderedDict
+
+from six.moves.urllib.parse import quote, urljoin
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.forms.widgets import Media
+from django.templatetags.static import PrefixNode, static
+from django.utils.html import format_html
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:  # pragma: no cover
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:  # pragma: no cover
+    rjsmin = None
+
+BUNDLES_DIR = 'cruds_bundles'
+MANIFEST_NAME = 'manifest.json'
+
+# in load order, a page gets the bundles it asks for plus the ones of the
+# media of its forms. ckeditor loads its plugins relative to its own path,
+# it is never bundled.
+BUNDLES = OrderedDict([
+    ('adminlte', {
+        'css': (
+            'bootstrap/dist/css/bootstrap.min.css',
+            'font-awesome/css/font-awesome.min.css',
+            'admin-lte/dist/css/AdminLTE.css',
+            'admin-lte/dist/css/skins/_all-skins.min.css',
+            'conflicts/conflicts.css',
+            'css/cruds.css',
+        ),
+        'js': (
+            'jquery/dist/jquery.min.js',
+        ),
+    }),
+    ('core', {
+        'css': (),
+        'js': (
+            'bootstrap/dist/js/bootstrap.min.js',
+            'admin-lte/dist/js/app.min.js',
+            'jquery-cookie/jquery.cookie.js',
+            'django_ajax/js/jquery.ajax.min.js',
+            'django_ajax/js/jquery.ajax-plugin.min.js',
+            'js/cruds.js',
+        ),
+    }),
+    # plugins cruds.js starts on every form
+    ('forms', {
+        'css': (
+            'icheck/skins/minimal/blue.css',
+            'datepicker/datepicker3.css',
+            'datetimepicker/css/bootstrap-datetimepicker.min.css',
+            'select2/css/select2.min.css',
+        ),
+        'js': (
+            'select2/js/select2.min.js',
+            'input-mask/jquery.inputmask.js',
+            'input-mask/jquery.inputmask.date.extensions.js',
+            'input-mask/jquery.inputmask.extensions.js',
+            'datepicker/bootstrap-datepicker.js',
+            'datetimepicker/js/bootstrap-datetimepicker.min.js',
+            'icheck/icheck.min.js',
+        ),
+    }),
+    ('timepicker', {
+        'css': ('timepicker/bootstrap-timepicker.min.css',),
+        'js': ('timepicker/bootstrap-timepicker.min.js',),
+    }),
+    ('colorpicker', {
+        'css': ('colorpicker/bootstrap-colorpicker.min.css',),
+        'js': ('colorpicker/bootstrap-colorpicker.min.js',),
+    }),
+    ('widgets', {
+        'css': (),
+        'js': ('js/widgets.js',),
+    }),
+])
+
+# bundles every object with media (forms, filters) needs
+FORM_BUNDLES = ('forms',)
+
+CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)(.*?)\1\s*\)')
+CSS_IMPORT_RE = re.compile(r'@import\s[^;]*;\s*')
+CSS_CHARSET_RE = re.compile(r'@charset\s[^;]*;\s*')
+JS_SOURCE_MAP_RE = re.compile(r'^//[#@] sourceMappingURL=.*$', re.M)
+
+_manifest = {}
+
+
+def get_bundle_index():
+    """
+    Returns a dict with the bundle of every bundled static path.
+    """
+    index = {}
+    for name, bundle in BUNDLES.items():
+        for kind in ('css', 'js'):
+            for path in bundle[kind]:
+                index[path] = name
+    return index
+
+
+def get_bundles_root():
+    return os.path.join(settings.STATIC_ROOT, BUNDLES_DIR)
+
+
+@receiver(setting_changed)
+def clear_manifest(setting=None, **kwargs):
+    if setting is None or setting == 'STATIC_ROOT':
+        _manifest.clear()
+
+
+def get_manifest():
+    """
+    Returns the files written by cruds_build_bundles, an empty dict while
+    they are not built. Read once per process.
+    """
+    if 'bundles' not in _manifest:
+        bundles = {}
+        if settings.STATIC_ROOT:
+            path = os.path.join(get_bundles_root(), MANIFEST_NAME)
+            if os.path.exists(path):
+                with io.open(path, encoding='utf-8') as manifest_file:
+                    bundles = json.load(manifest_file)
+        _manifest['bundles'] = bundles
+    return _manifest['bundles']
+
+
+def rewrite_css_urls(css, path):
+    """
+    Makes the relative urls of css, the content of static path, relative to
+    the bundles directory.
+    """
+    source_dir = posixpath.dirname(path)
+
+    def rewrite(match):
+        quote_char, url = match.groups()
+        if not url or url.startswith(('/', '#', 'data:')) or ':' in url:
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(source_dir, url))
+        url = posixpath.relpath(target, BUNDLES_DIR)
+        if match.group(2).endswith('/'):
+            url += '/'
+        return 'url(%s%s%s)' % (quote_char, url, quote_char)
+    return CSS_URL_RE.sub(rewrite, css)
+
+
+def minify_css(css):
+    if rcssmin is not None:
+        return rcssmin.cssmin(css)
+    css = re.sub(r'/\*(?!!).*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,])\s*', r'\1', css).strip()
+
+
+def minify_js(js):
+    if rjsmin is not None:
+        return rjsmin.jsmin(js)
+    return js
+
+
+def read_static(path):
+    found = finders.find(path)
+    if not found:
+        raise ValueError("Static file %s of the bundles not found" % path)
+    with io.open(found, encoding='utf-8-sig') as static_file:
+        return static_file.read()
+
+
+def build_css(paths):
+    imports = []
+    parts = []
+    for path in paths:
+        css = CSS_CHARSET_RE.sub('', rewrite_css_urls(read_static(path), path))
+        # @import is only valid at the top of the stylesheet
+        imports.extend(match.strip() for match in CSS_IMPORT_RE.findall(css))
+        parts.append(minify_css(CSS_IMPORT_RE.sub('', css)))
+    return '\n'.join(imports + parts)
+
+
+def build_js(paths):
+    # source maps do not match the bundle, and a file without its last
+    # semicolon must not run into the next one
+    return '\n;\n'.join(JS_SOURCE_MAP_RE.sub('', minify_js(read_static(path)))
+                         for path in paths)
+
+
+def write_bundle(root, name, kind, content):
+    """
+    Writes content with the hash in the file name, with the compressed
+    files next to it. Returns the path of the file, relative to
+    STATIC_ROOT.
+    """
+    data = content.encode('utf-8')
+    filename = '%s.%s.%s' % (name, hashlib.md5(data).hexdigest()[:12], kind)
+    target = os.path.join(root, filename)
+    with open(target, 'wb') as bundle_file:
+        bundle_file.write(data)
+    # mtime=0, the same bundle is always the same file
+    with open(target + '.gz', 'wb') as gz_file:
+        with gzip.GzipFile(filename, 'wb', 9, gz_file, 0) as compressed:
+            compressed.write(data)
+    if brotli is not None:
+        with open(target + '.br', 'wb') as br_file:
+            br_file.write(brotli.compress(data))
+    return posixpath.join(BUNDLES_DIR, filename)
+
+
+def build_bundles(names=None):
+    """
+    Builds the bundles in STATIC_ROOT/cruds_bundles and returns the new
+    manifest.
+    """
+    root = get_bundles_root()
+    if not os.path.isdir(root):
+        os.makedirs(root)
+    manifest = dict(get_manifest())
+    for name, bundle in BUNDLES.items():
+        if names and name not in names:
+            continue
+        files = {}
+        if bundle['css']:
+            files['css'] = write_bundle(root, name, 'css',
+                                        build_css(bundle['css']))
+        if bundle['js']:
+            files['js'] = write_bundle(root, name, 'js',
+                                       build_js(bundle['js']))
+        manifest[name] = files
+    with io.open(os.path.join(root, MANIFEST_NAME), 'w',
+                 encoding='utf-8') as manifest_file:
+        manifest_file.write(json.dumps(manifest, indent=2, sort_keys=True))
+    clear_manifest()
+    return manifest
+
+
+def get_media(objects):
+    """
+    Joins the media of objects (forms, widgets, Media, or lists of them).
+    """
+    media = Media()
+    for obj in objects:
+        if isinstance(obj, (list, tuple)):
+            media += get_media(obj)
+        elif isinstance(obj, Media):
+            media += obj
+        elif getattr(obj, 'media', None) is not None:
+            media += obj.media
+    return media
+
+
+def bundle_url(path):
+    return urljoin(PrefixNode.handle_simple('STATIC_URL'), quote(path))
+
+
+def render_bundles(names, objects, emitted):
+    """
+    Returns the html of bundles names and the ones needed by the media of
+    objects, skipping what is in the emitted set (which is updated). Names
+    with a dot are static files never bundled (``'ckeditor/ckeditor.js'``).
+    """
+    paths = [name for name in names if '.' in name]
+    names = [name for name in names if '.' not in name]
+    media = get_media(list(objects) + [Media(
+        css={'all': [path for path in paths if path.endswith('.css')]},
+        js=[path for path in paths if not path.endswith('.css')])])
+    if any(objects):
+        names.extend(FORM_BUNDLES)
+    index = get_bundle_index()
+    extra_css = []
+    extra_js = []
+    for path in media._css.get('all', ()):
+        if path in index:
+            names.append(index[path])
+        elif path not in emitted:
+            extra_css.append(path)
+    for path in media._js:
+        if path in index:
+            names.append(index[path])
+        elif path not in emitted:
+            extra_js.append(path)
+
+    manifest = get_manifest()
+    css = []
+    js = []
+    for name in BUNDLES:
+        if name not in names or name in emitted:
+            continue
+        emitted.add(name)
+        if name in manifest:
+            css.extend(bundle_url(manifest[name][kind])
+                       for kind in ('css',) if kind in manifest[name])
+            js.extend(bundle_url(manifest[name][kind])
+                      for kind in ('js',) if kind in manifest[name])
+        else:
+            css.extend(static(path) for path in BUNDLES[name]['css'])
+            js.extend(static(path) for path in BUNDLES[name]['js'])
+    emitted.update(extra_css)
+    emitted.update(extra_js)
+    css.extend(media.absolute_path(path) for path in extra_css)
+    js.extend(media.absolute_path(path) for path in extra_js)
+
+    html = [format_html('<link href="{}" type="text/css" rel="stylesheet">',
+                        url) for url in css]
+    html.extend(format_html('<script type="text/javascript" src="{}"></script>',
+                            url) for url in js)
+    return '\n'.join(html)
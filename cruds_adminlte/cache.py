@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+VERSION_KEY = 'cruds_adminlte:version:%s'
+ROW_VERSION_KEY = 'cruds_adminlte:row_version:%s:%s'
+
+_tracked = set()
+_tracked_rows = set()
+
+
+def get_version_key(model):
+    return VERSION_KEY % model._meta.label_lower
+
+
+def get_model_version(model):
+    """
+    Returns the version of model data, it changes every time an instance is
+    saved or deleted (only for models passed to :func:`track_model`).
+    """
+    key = get_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # start from the clock, a version evicted from the cache never
+        # comes back with a value used before
+        cache.add(key, int(time.time() * 1000))
+        version = cache.get(key)
+    return version
+
+
+def bump_model_version(model):
+    key = get_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_model_version(model)
+
+
+def get_models_version(models):
+    """
+    Returns a string with the versions of all models, used in cache keys.
+    """
+    return '.'.join('%s' % get_model_version(model) for model in models)
+
+
+def handle_change(sender, instance=None, **kwargs):
+    bump_model_version(sender)
+
+
+def handle_m2m_change(sender, instance=None, model=None, action=None,
+                      **kwargs):
+    if action and not action.startswith('post_'):
+        return
+    for changed in (sender, instance.__class__, model):
+        if changed in _tracked:
+            bump_model_version(changed)
+
+
+def track_model(model):
+    """
+    Bumps the model version when instances are saved, deleted or their many
+    to many relations change.
+    """
+    if model in _tracked:
+        return
+    _tracked.add(model)
+    dispatch_uid = 'cruds_adminlte_version_%s' % model._meta.label_lower
+    post_save.connect(handle_change, sender=model, dispatch_uid=dispatch_uid)
+    post_delete.connect(handle_change, sender=model,
+                        dispatch_uid=dispatch_uid)
+    m2m_changed.connect(handle_m2m_change,
+                        dispatch_uid='cruds_adminlte_version_m2m')
+
+
+def get_row_version_key(model, pk):
+    return ROW_VERSION_KEY % (model._meta.label_lower, pk)
+
+
+def get_row_versions(model, pks):
+    """
+    Returns a dict with the version of every row, read with one
+    ``get_many``. Versions change when the row is evicted by
+    :func:`evict_row` (only for models passed to :func:`track_rows`).
+    """
+    keys = dict((pk, get_row_version_key(model, pk)) for pk in pks)
+    found = cache.get_many(list(keys.values()))
+    versions = {}
+    for pk, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, int(time.time() * 1000))
+            version = cache.get(key)
+        versions[pk] = version
+    return versions
+
+
+def evict_row(model, pk):
+    cache.delete(get_row_version_key(model, pk))
+
+
+def handle_row_change(sender, instance=None, **kwargs):
+    evict_row(sender, instance.pk)
+
+
+def handle_row_m2m_change(sender, instance=None, model=None, action=None,
+                          pk_set=None, reverse=False, **kwargs):
+    if action and not action.startswith('post_'):
+        return
+    if instance.__class__ in _tracked_rows:
+        evict_row(instance.__class__, instance.pk)
+    if model in _tracked_rows:
+        for pk in pk_set or []:
+            evict_row(model, pk)
+
+
+def track_rows(model):
+    """
+    Evicts the version of a row when the instance is saved, deleted or its
+    many to many relations change.
+    """
+    if model in _tracked_rows:
+        return
+    _tracked_rows.add(model)
+    dispatch_uid = 'cruds_adminlte_row_%s' % model._meta.label_lower
+    post_save.connect(handle_row_change, sender=model,
+                      dispatch_uid=dispatch_uid)
+    post_delete.connect(handle_row_change, sender=model,
+                        dispatch_uid=dispatch_uid)
+    m2m_changed.connect(handle_row_m2m_change,
+                        dispatch_uid='cruds_adminlte_row_m2m')
+
+
+class RowCache(object):
+    """
+    Rendered rows of a list page, all of them read with one ``get_many``.
+    ``keys`` maps the primary key of every row to its cache key.
+    """
+
+    def __init__(self, keys, timeout):
+        self.keys = keys
+        self.timeout = timeout
+        self.fragments = cache.get_many(list(keys.values())) if keys else {}
+
+    def get(self, obj):
+        return self.fragments.get(self.keys.get(obj.pk))
+
+    def set(self, obj, html):
+        key = self.keys.get(obj.pk)
+        if key is not None:
+            self.fragments[key] = html
+            cache.set(key, html, self.timeout)
+
+
+def get_lookup_models(model, lookups):
+    """
+    Returns model and the models reached following lookups, the data a
+    filtered list depends on.
+    """
+    models = [model]
+    for lookup in lookups or []:
+        opts = model._meta
+        for part in lookup.lstrip('-+').split('__'):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation or field.related_model is None:
+                break
+            through = getattr(field.remote_field, 'through', None) or \
+                getattr(field, 'through', None)
+            for related in (field.related_model, through):
+                if related is not None and related not in models:
+                    models.append(related)
+            opts = field.related_model._meta
+    return models
+
+
+def get_signature(*parts):
+    signature = '|'.join('%s' % (part,) for part in parts)
+    return hashlib.md5(signature.encode('utf-8')).hexdigest()
+
+
+def get_cache_key(prefix, *parts):
+    return 'cruds_adminlte:%s:%s' % (prefix, get_signature(*parts))
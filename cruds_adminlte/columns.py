@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Renderers of the list table cells, one callable per field type (the lower
+cased internal type: ``charfield``, ``foreignkey``...).
+
+A ``cruds/columns/<type>.html`` template of your project still wins over the
+renderer of its type, the templates shipped with cruds_adminlte are only
+used for types without renderer.
+"""
+from __future__ import unicode_literals
+
+import os.path
+
+from django.template import TemplateDoesNotExist
+from django.template.base import render_value_in_context
+from django.utils.safestring import mark_safe
+
+BUILTIN_TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+COLUMN_TEMPLATE = 'cruds/columns/%s.html'
+
+
+def get_value(obj, field):
+    # imported here, crud_tags imports this module
+    from cruds_adminlte.templatetags.crud_tags import format_value
+    return format_value(obj, field)
+
+
+def render_default(obj, field, context):
+    return render_value_in_context(get_value(obj, field), context)
+
+
+def render_autofield(obj, field, context):
+    return '#' + render_default(obj, field, context)
+
+
+def render_booleanfield(obj, field, context):
+    if get_value(obj, field) in (True, 1):
+        return mark_safe('<div class="text-center true">'
+                         '<i class="fa fa-check-square"></i></div>')
+    return mark_safe('<div class="text-center false">'
+                     '<i class="fa fa-square-o"></i></div>')
+
+
+COLUMN_RENDERERS = {
+    'autofield': render_autofield,
+    'bigautofield': render_autofield,
+    'smallautofield': render_autofield,
+    'booleanfield': render_booleanfield,
+}
+
+
+def register_column(field_type, renderer):
+    """
+    Sets the renderer of the cells of field_type, a callable taking the
+    object, the field name and the template context that returns the cell
+    html::
+
+        register_column('decimalfield', render_money)
+    """
+    COLUMN_RENDERERS[field_type.lower()] = renderer
+
+
+class TemplateColumn(object):
+    """
+    Renders the cells with a ``cruds/columns`` template of the project.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __call__(self, obj, field, context):
+        with context.push(object=obj, field=field):
+            return self.template.render(context)
+
+
+def is_builtin(template):
+    origin = getattr(template, 'origin', None)
+    name = getattr(origin, 'name', None) or ''
+    return os.path.abspath(name).startswith(BUILTIN_TEMPLATES_DIR)
+
+
+def get_column_renderer(field_type, engine):
+    """
+    Returns the renderer of field_type cells, looking up the template once.
+    """
+    field_type = field_type.lower()
+    try:
+        template = engine.get_template(COLUMN_TEMPLATE % field_type)
+    except TemplateDoesNotExist:
+        template = None
+    if template is not None and not is_builtin(template):
+        return TemplateColumn(template)
+    return COLUMN_RENDERERS.get(field_type, render_default)
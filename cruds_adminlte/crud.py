@@ -7,12 +7,24 @@ Free as freedom will be 26/8/2016
 '''
 
 
+import csv
+import datetime
+import json
 import os
+import six
 from django.conf.urls import url, include
+from calendar import timegm
+
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http.response import HttpResponseRedirect, HttpResponseForbidden
-from django.urls.base import reverse_lazy, reverse
-from django.urls.exceptions import NoReverseMatch
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http.response import (HttpResponseRedirect,
+                                  HttpResponseForbidden, JsonResponse,
+                                  HttpResponseBadRequest,
+                                  StreamingHttpResponse)
+from django.urls.base import reverse_lazy
 from django.views import View
 from django.views.generic import (ListView, CreateView, DeleteView,
                                   UpdateView, DetailView)
@@ -21,16 +33,66 @@ from cruds_adminlte import utils
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
-from django.db.models.query_utils import Q
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import prefetch_related_objects
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string, select_template
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag, urlencode
+from django.utils import timezone, translation
+from cruds_adminlte.actions import get_list_actions
 from cruds_adminlte.filter import get_filters
+from cruds_adminlte.search import get_search_backend, parse_search
+from cruds_adminlte.templatetags.crud_tags import format_value
+from cruds_adminlte.cache import (get_cache_key, get_lookup_models,
+                                  get_models_version, get_signature,
+                                  track_model,
+                                  bump_model_version, track_rows,
+                                  get_row_versions, evict_row, RowCache)
+from cruds_adminlte.pagination import (KeysetPaginator, DeferredPage,
+                                       CountStrategyPaginator)
 from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:  # python 2
+    from collections import Mapping
 from django.views.generic.edit import ProcessFormView
 import types
 
 from betterforms.multiform import MultiModelForm, MultiForm
 
+# where the list template renders its rows, streamed lists send the page
+# before and after it around the rows
+LIST_ROWS_MARKER = mark_safe('<!-- cruds_adminlte:rows -->')
+
+
+class CRUDPerms(Mapping):
+    """
+    The ``crud_perms`` of templates, every action is checked the first time
+    it is read.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.decisions = {}
+
+    def __getitem__(self, action):
+        if action not in self.decisions:
+            if action not in self.view.all_perms:
+                raise KeyError(action)
+            self.decisions[action] = self.view.check_action_perms(action)
+        return self.decisions[action]
+
+    def __iter__(self):
+        return iter(self.view.all_perms)
+
+    def __len__(self):
+        return len(self.view.all_perms)
+
+
 class CRUDMixin(object):
 
     def get_template_names(self):
@@ -65,6 +127,18 @@ class CRUDMixin(object):
             self.getparams += "&".join(filter_params)
 
     def validate_user_perms(self, user, perm, view):
+        """
+        Decisions are kept for the request, dispatch and crud_perms check
+        the same perms.
+        """
+        if not hasattr(self, '_perm_decisions'):
+            self._perm_decisions = {}
+        key = (user.pk, perm, view)
+        if key not in self._perm_decisions:
+            self._perm_decisions[key] = self.check_user_perm(user, perm, view)
+        return self._perm_decisions[key]
+
+    def check_user_perm(self, user, perm, view):
 
         if (hasattr(self, 'get_object') and view == 'update'):
             try:
@@ -77,20 +151,60 @@ class CRUDMixin(object):
             return perm(user, view)
         return user.has_perm(perm)
 
-    def get_check_perms(self, context):
+    def check_action_perms(self, action):
+        if not self.check_perms:
+            return True
+        if action not in self.views_available:
+            return False
         user = self.request.user
-        available_perms = {}
-        for perm in self.all_perms:
-            if self.check_perms:
-                if perm in self.views_available:
-                    available_perms[perm] = all([
-                        self.validate_user_perms(user, x, perm)
-                        for x in self.all_perms[perm]])
-                else:
-                    available_perms[perm] = False
-            else:
-                available_perms[perm] = True
-        context['crud_perms'] = available_perms
+        return all(self.validate_user_perms(user, perm, action)
+                   for perm in self.all_perms[action])
+
+    def get_check_perms(self, context):
+        context['crud_perms'] = CRUDPerms(self)
+
+    def get_perms_signature(self):
+        """
+        Part of the ETag telling apart users, they see their name and only
+        the actions they are allowed to.
+        """
+        context = {}
+        self.get_check_perms(context)
+        return get_signature(self.request.user.pk,
+                             sorted(context['crud_perms'].items()))
+
+    def get_etag(self):
+        return None
+
+    def get_last_modified(self):
+        return None
+
+    def render_conditional(self, get, request, *args, **kwargs):
+        """
+        Answers 304 Not Modified when the ETag or Last-Modified of the page
+        the client has are still valid, calls get otherwise.
+        """
+        if messages.get_messages(request):
+            # messages are shown, and consumed, by the rendered page
+            return get(request, *args, **kwargs)
+        etag = self.get_etag()
+        if etag is not None:
+            etag = quote_etag(etag)
+        last_modified = self.get_last_modified()
+        if last_modified is not None:
+            last_modified = timegm(last_modified.utctimetuple())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if etag is not None and not response.has_header('ETag'):
+                response['ETag'] = etag
+            if last_modified is not None and \
+                    not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     def get_urls_and_fields(self, context):
         include = None
@@ -101,26 +215,9 @@ class CRUDMixin(object):
             include = getattr(self, 'list_fields')
 
         context['fields'] = utils.get_fields(self.model, include=include)
-        if hasattr(self, 'object') and self.object:
-            for action in utils.INSTANCE_ACTIONS:
-                try:
-                    nurl = utils.crud_url_name(self.model, action)
-                    if self.namespace:
-                        nurl = self.namespace + ':' + nurl
-                    url = reverse(nurl, kwargs={'pk': self.object.pk})
-                except NoReverseMatch:
-                    url = None
-                context['url_%s' % action] = url
-
-        for action in utils.LIST_ACTIONS:
-            try:
-                nurl = utils.crud_url_name(self.model, action)
-                if self.namespace:
-                    nurl = self.namespace + ':' + nurl
-                url = reverse(nurl)
-            except NoReverseMatch:
-                url = None
-            context['url_%s' % action] = url
+        obj = getattr(self, 'object', None)
+        context.update(utils.get_action_urls(
+            self.model, self.namespace, obj.pk if obj else None))
 
     def get_context_data(self, **kwargs):
         """
@@ -155,6 +252,11 @@ class CRUDMixin(object):
         context.update(self.context_rel)
         context['getparams'] = "?" + self.getparams
         context['getparams'] += "&" if self.getparams else ""
+        if self.view_type == 'list':
+            context['pageparams'] = context['getparams']
+            if context.get('q'):
+                context['pageparams'] += urlencode({'q': context['q']}) + "&"
+            context['sortparams'] = context['pageparams']
         return context
 
     def dispatch(self, request, *args, **kwargs):
@@ -163,7 +265,6 @@ class CRUDMixin(object):
         getparams = []
         self.getparams = ''
 
-        #TODO: fix search in related tables
         for related in self.related_fields:
             #TODO: pk = request.GET something like model name??
             pk = self.request.GET.get(related, '')
@@ -184,6 +285,20 @@ class CRUDMixin(object):
         return View.dispatch(self, request, *args, **kwargs)
 
 
+class CRUDObjectMixin(CRUDMixin):
+    """
+    Views of one object (detail, update, delete), it is loaded once per
+    request for the permission checks and the view.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super(CRUDObjectMixin, self).get_object(queryset)
+        if not hasattr(self, '_crud_object'):
+            self._crud_object = super(CRUDObjectMixin, self).get_object()
+        return self._crud_object
+
+
 class CRUDView(object):
     """
         CRUDView is a generic way to provide create, list, detail, update,
@@ -308,6 +423,26 @@ class CRUDView(object):
     paginate_by = 10
     paginate_template = 'cruds/pagination/prev_next.html'
     paginate_position = 'Bottom'
+    pagination_mode = 'offset'
+    count_strategy = 'exact'
+    count_cap = 10000
+    count_cache_timeout = 30
+    list_only_fields = True
+    list_cache_timeout = None
+    row_cache_timeout = None
+    row_version_field = None
+    conditional_get = False
+    list_streaming = False
+    streaming_chunk_size = 500
+    export_fields = None
+    export_chunk_size = 2000
+    list_actions = None
+    list_datatables = False
+    sortable_fields = None
+    indexed_sort_fields = None
+    unindexed_sort_limit = None
+    datatables_max_length = 100
+    template_engine = None
     update_form = None
     add_form = None
     display_fields = None
@@ -317,6 +452,7 @@ class CRUDView(object):
     template_father = "cruds/base.html"
     search_fields = None
     split_space_search = False
+    search_backend = 'orm'
     related_fields = None
     list_filter = None
 
@@ -354,6 +490,9 @@ class CRUDView(object):
     def decorator_delete(self, viewclass):
         return self.check_decorator(viewclass)
 
+    def decorator_export(self, viewclass):
+        return self.check_decorator(viewclass)
+
     #  GET GENERIC CLASS
 
     def get_create_view_class(self):
@@ -423,19 +562,29 @@ class CRUDView(object):
 
     def get_detail_view(self):
         ODetailViewClass = self.get_detail_view_class()
-
-        class ODetailView(CRUDMixin, ODetailViewClass):
+        view_etag_models = []
+        if self.conditional_get:
+            track_rows(self.model)
+            view_etag_models = self.get_detail_etag_models()
+            for model in view_etag_models:
+                track_model(model)
+
+        class ODetailView(CRUDObjectMixin, ODetailViewClass):
             namespace = self.namespace
             perms = self.perms['detail']
             all_perms = self.perms
             view_type = 'detail'
             display_fields = self.display_fields
+            template_engine = self.template_engine
             inlines = self.inlines
             views_available = self.views_available[:]
             check_perms = self.check_perms
             template_father = self.template_father
             template_blocks = self.template_blocks
             related_fields = self.related_fields
+            conditional_get = self.conditional_get
+            row_version_field = self.row_version_field
+            etag_models = view_etag_models
 
             def get_success_url(self):
                 url = super(ODetailView, self).get_success_url()
@@ -443,6 +592,50 @@ class CRUDView(object):
                     url += '?' + self.getparams
                 return url
 
+            def get_row_version(self):
+                """
+                Version of the object kept by the row signals, None when
+                the url has no primary key.
+                """
+                pk = self.kwargs.get(self.pk_url_kwarg)
+                if pk is None:
+                    return None
+                try:
+                    pk = self.model._meta.pk.to_python(pk)
+                except ValidationError:
+                    return None
+                return get_row_versions(self.model, [pk])[pk]
+
+            def get_etag(self):
+                version = self.get_row_version()
+                if version is None:
+                    return None
+                if self.row_version_field:
+                    version = (version, getattr(
+                        self.get_object(), self.row_version_field))
+                return get_signature(
+                    'detail', self.request.path, version,
+                    get_models_version(self.etag_models),
+                    self.get_perms_signature(), self.getparams,
+                    self.template_engine, self.get_template_names(),
+                    translation.get_language(),
+                    timezone.get_current_timezone_name())
+
+            def get_last_modified(self):
+                if not self.row_version_field:
+                    return None
+                value = getattr(self.get_object(), self.row_version_field)
+                if isinstance(value, datetime.datetime):
+                    return value
+                return None
+
+            def get(self, request, *args, **kwargs):
+                get = super(ODetailView, self).get
+                if self.conditional_get:
+                    return self.render_conditional(
+                        get, request, *args, **kwargs)
+                return get(request, *args, **kwargs)
+
         return ODetailView
 
     def get_update_view_class(self):
@@ -451,7 +644,7 @@ class CRUDView(object):
     def get_update_view(self):
         EditViewClass = self.get_update_view_class()
 
-        class OEditView(CRUDMixin, EditViewClass):
+        class OEditView(CRUDObjectMixin, EditViewClass):
             namespace = self.namespace
             perms = self.perms['update']
             form_class = self.update_form
@@ -509,26 +702,9 @@ class CRUDView(object):
                 else:
                     context['fields'] = utils.get_fields(self.model, include=include)
 
-                if hasattr(self, 'object') and self.object:
-                    for action in utils.INSTANCE_ACTIONS:
-                        try:
-                            nurl = utils.crud_url_name(self.model, action)
-                            if self.namespace:
-                                nurl = self.namespace + ':' + nurl
-                            url = reverse(nurl, kwargs={'pk': self.object.pk})
-                        except NoReverseMatch:
-                            url = None
-                        context['url_%s' % action] = url
-
-                for action in utils.LIST_ACTIONS:
-                    try:
-                        nurl = utils.crud_url_name(self.model, action)
-                        if self.namespace:
-                            nurl = self.namespace + ':' + nurl
-                        url = reverse(nurl)
-                    except NoReverseMatch:
-                        url = None
-                    context['url_%s' % action] = url
+                obj = getattr(self, 'object', None)
+                context.update(utils.get_action_urls(
+                    self.model, self.namespace, obj.pk if obj else None))
 
                 context['url_list'] = str(os.sep).join([ x for x in self.request.path.split(os.sep) if not utils.is_number(x) ]).replace('update', 'list')
                 context['url_detail'] = self.request.path.replace('update', 'detail')
@@ -571,8 +747,77 @@ class CRUDView(object):
     def get_list_view_class(self):
         return ListView
 
+    def get_search_backend(self):
+        """
+        Returns the search backend instance used by the list view, None when
+        there are no search_fields.
+        """
+        if not self.search_fields:
+            return None
+        return get_search_backend(
+            self.search_backend, self.model, self.search_fields)
+
+    def get_list_cache_models(self):
+        """
+        Returns the models whose changes invalidate cached list results,
+        the model and the ones reached by search, filters and related_fields.
+        """
+        lookups = list(self.search_fields or []) + \
+            list(self.related_fields or []) + \
+            [field for field in self.list_filter or []
+             if isinstance(field, six.string_types)]
+        return get_lookup_models(self.model, lookups)
+
+    def get_row_cache_models(self):
+        """
+        Returns the related models rendered in the list rows, their changes
+        invalidate cached rows.
+        """
+        names = self.list_fields or [
+            field.name for field in self.model._meta.fields]
+        return get_lookup_models(self.model, names)[1:]
+
+    def get_list_etag_models(self):
+        """
+        Returns the models whose changes invalidate the ETag of list pages,
+        the ones of the list cache and the related models in the columns.
+        """
+        models = self.get_list_cache_models()
+        return models + [model for model in self.get_row_cache_models()
+                         if model not in models]
+
+    def get_detail_etag_models(self):
+        """
+        Returns the related models shown by the detail page, their changes
+        invalidate its ETag (the object has its own row version).
+        """
+        names = self.display_fields or [
+            field.name for field in self.model._meta.fields]
+        return get_lookup_models(self.model, names)[1:]
+
     def get_list_view(self):
         OListViewClass = self.get_list_view_class()
+        list_paginate_template = self.paginate_template
+        if self.pagination_mode == 'keyset' and \
+                list_paginate_template == CRUDView.paginate_template:
+            list_paginate_template = 'cruds/pagination/keyset.html'
+        view_cache_models = []
+        if self.list_cache_timeout:
+            view_cache_models = self.get_list_cache_models()
+            for model in view_cache_models:
+                track_model(model)
+        view_row_models = []
+        if self.row_cache_timeout:
+            track_rows(self.model)
+            view_row_models = self.get_row_cache_models()
+            for model in view_row_models:
+                track_model(model)
+
+        view_list_etag_models = []
+        if self.conditional_get:
+            view_list_etag_models = self.get_list_etag_models()
+            for model in view_list_etag_models:
+                track_model(model)
 
         class OListView(CRUDMixin, OListViewClass):
             namespace = self.namespace
@@ -581,72 +826,695 @@ class CRUDView(object):
             list_fields = self.list_fields
             view_type = 'list'
             paginate_by = self.paginate_by
+            template_engine = self.template_engine
             views_available = self.views_available[:]
             check_perms = self.check_perms
             template_father = self.template_father
             template_blocks = self.template_blocks
             search_fields = self.search_fields
             split_space_search = self.split_space_search
+            search_backend = self.get_search_backend()
             related_fields = self.related_fields
-            paginate_template = self.paginate_template
+            paginate_template = list_paginate_template
             paginate_position = self.paginate_position
+            pagination_mode = self.pagination_mode
+            count_strategy = self.count_strategy
+            count_cap = self.count_cap
+            count_cache_timeout = self.count_cache_timeout
+            list_only_fields = self.list_only_fields
+            list_cache_timeout = self.list_cache_timeout
+            list_cache_models = view_cache_models
+            row_cache_timeout = self.row_cache_timeout
+            row_version_field = self.row_version_field
+            row_cache_models = view_row_models
+            conditional_get = self.conditional_get
+            etag_models = view_list_etag_models
+            list_actions = get_list_actions(self.list_actions)
+            list_datatables = self.list_datatables
+            list_streaming = self.list_streaming
+            streaming_chunk_size = self.streaming_chunk_size
+            unfiltered = False
+            search_applied = False
+            filters_applied = False
+            sortable_fields = self.sortable_fields
+            indexed_sort_fields = self.indexed_sort_fields
+            unindexed_sort_limit = self.unindexed_sort_limit
+            datatables_max_length = self.datatables_max_length
             list_filter = self.list_filter
 
             def get_listfilter_queryset(self, queryset):
-                if self.list_filter:
+                self.filters_applied = False
+                if self.list_filter and not self.unfiltered:
                     filters = get_filters(
                         self.model, self.list_filter, self.request)
                     for filter in filters:
-                        queryset = filter.get_filter(queryset)
+                        filtered = filter.get_filter(queryset)
+                        if filtered is not queryset:
+                            self.filters_applied = True
+                        queryset = filtered
 
                 return queryset
 
+            def get_search_query(self):
+                """
+                Returns the search text, ``q`` or DataTables ``search[value]``.
+                """
+                if '_datatables' in self.request.GET:
+                    return self.request.GET.get('search[value]')
+                return self.request.GET.get('q')
+
             def search_queryset(self, query):
                 if self.split_space_search is True:
                     self.split_space_search = ' '
 
-                if self.search_fields and 'q' in self.request.GET:
-                    q = self.request.GET.get('q')
-                    if self.split_space_search:
-                        q = q.split(self.split_space_search)
-                    elif q:
-                        q = [q]
-                    sfilter = None
-                    for field in self.search_fields:
-                        for qsearch in q:
-                            if field not in self.context_rel:
-                                if sfilter is None:
-                                    sfilter = Q(**{field: qsearch})
-                                else:
-                                    sfilter |= Q(**{field: qsearch})
-                    if sfilter is not None:
-                        query = query.filter(sfilter)
-
-                if self.related_fields:
-                    query = query.filter(**self.context_rel)
+                self.search_applied = False
+                q = self.get_search_query()
+                if self.search_fields and q is not None and \
+                        not self.unfiltered:
+                    fields = [field for field in self.search_fields
+                              if field not in self.context_rel]
+                    terms = parse_search(q,
+                                         self.split_space_search, fields)
+                    if terms and fields:
+                        self.search_applied = True
+                        query = self.search_backend.search(
+                            query, fields, terms)
+
+                for related, value in self.context_rel.items():
+                    query = query.filter(
+                        utils.get_lookup_filter(self.model, related, value))
                 return query
 
+            def apply_select_related(self, queryset):
+                """
+                Joins or prefetches the relations rendered by list_fields,
+                so a page costs the same number of queries for any size.
+                """
+                select_related, prefetch_related = \
+                    utils.get_related_lookups(self.model, self.list_fields)
+                if select_related:
+                    queryset = queryset.select_related(*select_related)
+                if prefetch_related:
+                    queryset = queryset.prefetch_related(*prefetch_related)
+                return queryset
+
+            def apply_only_fields(self, queryset):
+                """
+                Loads only the columns list_fields needs, set list_only_fields
+                to False if your templates read other attributes.
+                """
+                if not self.list_only_fields:
+                    return queryset
+                ordering = queryset.query.order_by or \
+                    self.model._meta.ordering
+                lookups = utils.get_only_fields(
+                    self.model, self.list_fields, ordering)
+                if self.row_cache_timeout and self.row_version_field and \
+                        self.row_version_field not in lookups:
+                    lookups.append(self.row_version_field)
+                return queryset.only(*lookups)
+
             def get_success_url(self):
                 url = super(OListView, self).get_success_url()
                 if (self.getparams):  # fixed filter detail action
                     url += '?' + self.getparams
                 return url
 
+            def get_sortable_fields(self):
+                if self.sortable_fields is not None:
+                    return self.sortable_fields
+                return utils.get_export_fields(self.model, self.list_fields)
+
+            def get_indexed_sort_fields(self):
+                if self.indexed_sort_fields is not None:
+                    return self.indexed_sort_fields
+                return utils.get_indexed_fields(self.model)
+
+            def get_sort_params(self):
+                """
+                Returns the fields asked in ``?o=`` (comma separated, ``-``
+                for descending order).
+                """
+                return [name.strip() for name in
+                        self.request.GET.get('o', '').split(',')
+                        if name.strip()]
+
+            def clean_ordering(self, queryset, names):
+                """
+                Keeps sortable fields, refuses sorts not served by an index
+                when unindexed_sort_limit is exceeded and appends the pk so
+                rows always have the same order.
+                """
+                sortable = self.get_sortable_fields()
+                ordering = []
+                for name in names:
+                    field = name.lstrip('-')
+                    if field in sortable and field not in [
+                            item.lstrip('-') for item in ordering]:
+                        ordering.append(name)
+                if not ordering:
+                    return []
+                if self.unindexed_sort_limit is not None:
+                    indexed = self.get_indexed_sort_fields()
+                    if any(name.lstrip('-') not in indexed
+                           for name in ordering):
+                        limit = self.unindexed_sort_limit
+                        if limit <= 0 or queryset.order_by().values(
+                                'pk')[:limit + 1].count() > limit:
+                            return []
+                pk_name = self.model._meta.pk.name
+                if not any(name.lstrip('-') in ('pk', pk_name)
+                           for name in ordering):
+                    ordering.append('-pk' if ordering[-1][0] == '-'
+                                    else 'pk')
+                return ordering
+
+            def sort_queryset(self, queryset):
+                ordering = self.clean_ordering(queryset,
+                                               self.get_sort_params())
+                if not ordering:
+                    ordering = list(queryset.query.order_by or
+                                    self.model._meta.ordering or [])
+                    if ordering and any(
+                            not isinstance(name, six.string_types) or
+                            name == '?' for name in ordering):
+                        return queryset
+                    pk_name = self.model._meta.pk.name
+                    if any(name.lstrip('-') in ('pk', pk_name)
+                           for name in ordering):
+                        return queryset
+                    ordering.append('pk')
+                self.ordering_applied = ordering
+                return queryset.order_by(*ordering)
+
+            def get_sort_headers(self, fields, params):
+                """
+                Returns, for every field in the table, None when it can not
+                be sorted or the url and current direction of its header.
+                """
+                sortable = self.get_sortable_fields()
+                current = getattr(self, 'ordering_applied', [])
+                first = current[0] if current and self.get_sort_params() \
+                    else ''
+                headers = {}
+                for field in fields:
+                    if field not in sortable:
+                        headers[field] = None
+                        continue
+                    direction = None
+                    order = field
+                    if first.lstrip('-') == field:
+                        direction = 'desc' if first[0] == '-' else 'asc'
+                        order = field if direction == 'desc' else '-' + field
+                    headers[field] = {
+                        'url': '%s%s' % (params, urlencode({'o': order})),
+                        'direction': direction,
+                    }
+                return headers
+
+            def get_total_queryset(self):
+                """
+                Rows of the list before search and filters, still scoped by
+                related_fields and get_queryset overrides (per user lists).
+                """
+                self.unfiltered = True
+                try:
+                    return self.get_queryset()
+                finally:
+                    self.unfiltered = False
+
             def get_queryset(self):
                 queryset = super(OListView, self).get_queryset()
                 queryset = self.search_queryset(queryset)
                 queryset = self.get_listfilter_queryset(queryset)
+                queryset = self.sort_queryset(queryset)
+                queryset = self.apply_select_related(queryset)
+                queryset = self.apply_only_fields(queryset)
                 return queryset
 
+            def get_paginator(self, queryset, per_page, orphans=0,
+                              allow_empty_first_page=True, **kwargs):
+                return CountStrategyPaginator(
+                    queryset, per_page, orphans=orphans,
+                    allow_empty_first_page=allow_empty_first_page,
+                    strategy=self.count_strategy,
+                    cap=self.count_cap,
+                    cache_timeout=self.count_cache_timeout,
+                    cache_version=self.get_list_cache_version())
+
+            def get_list_cache_version(self):
+                if not self.list_cache_models:
+                    return None
+                if not hasattr(self, '_list_cache_version'):
+                    self._list_cache_version = get_models_version(
+                        self.list_cache_models)
+                return self._list_cache_version
+
+            def get_list_cache_scope(self):
+                """
+                Part of the cache key telling apart users that may see
+                different rows, the user and their CRUD permissions by
+                default.
+                """
+                return self.get_perms_signature()
+
+            def get_list_cache_key(self, page_size):
+                params = sorted(
+                    (key, value) for key, values in self.request.GET.lists()
+                    for value in values if key != '_count')
+                related = sorted((key, value.pk)
+                                 for key, value in self.context_rel.items())
+                # the path, url kwargs and view classes tell apart CRUDViews
+                # of the same model, inline lists and get_queryset overrides
+                views = ['%s.%s' % (cls.__module__, cls.__qualname__)
+                         for cls in type(self).__mro__]
+                return get_cache_key(
+                    'list', self.model._meta.label_lower,
+                    self.get_list_cache_version(), self.request.path,
+                    sorted(self.kwargs.items()), views, params, related,
+                    self.get_list_cache_scope(), page_size,
+                    self.count_strategy, self.count_cap)
+
+            def get_cached_page(self, page_size, cached):
+                paginator = self.get_paginator(
+                    self.get_queryset(), page_size,
+                    orphans=self.get_paginate_orphans(),
+                    allow_empty_first_page=self.get_allow_empty())
+                if cached['count'] is not None:
+                    paginator.set_count(cached['count'], cached['capped'],
+                                        cached['estimated'])
+                # rows that get_queryset no longer lists are left out
+                queryset = self.get_total_queryset().filter(
+                    pk__in=cached['pks']).order_by()
+                objects = dict((obj.pk, obj) for obj in queryset)
+                object_list = [objects[pk] for pk in cached['pks']
+                               if pk in objects]
+                if paginator.deferred:
+                    page = DeferredPage(object_list, cached['number'],
+                                        paginator, cached['has_next'])
+                else:
+                    page = paginator._get_page(
+                        object_list, cached['number'], paginator)
+                return (paginator, page, page.object_list,
+                        page.has_other_pages())
+
+            def paginate_cached_queryset(self, queryset, page_size):
+                """
+                Offset pagination keeping the primary keys of the page and
+                the count in the cache, reused until the models listed
+                change.
+                """
+                key = self.get_list_cache_key(page_size)
+                cached = cache.get(key)
+                if cached is not None:
+                    return self.get_cached_page(page_size, cached)
+                result = super(OListView, self).paginate_queryset(
+                    queryset, page_size)
+                paginator, page = result[:2]
+                cache.set(key, {
+                    'pks': [obj.pk for obj in page.object_list],
+                    'count': None if paginator.deferred else paginator.count,
+                    'capped': paginator.capped,
+                    'estimated': paginator.estimated,
+                    'number': page.number,
+                    'has_next': page.has_next(),
+                }, self.list_cache_timeout)
+                return result
+
+            def get_count_response(self):
+                """
+                Total of rows for deferred counts, answered by the list url
+                itself so search, filters and perms are the same.
+                """
+                paginator = self.get_paginator(
+                    self.get_queryset(), self.get_paginate_by(None) or 1)
+                return JsonResponse({
+                    'count': paginator.count,
+                    'num_pages': paginator.num_pages,
+                    'count_display': paginator.count_display,
+                })
+
+            def get_datatables_ordering(self, queryset):
+                params = self.request.GET
+                names = []
+                index = 0
+                while 'order[%s][column]' % index in params:
+                    column = params.get('order[%s][column]' % index)
+                    field = params.get('columns[%s][data]' % column, '')
+                    desc = params.get('order[%s][dir]' % index) == 'desc'
+                    names.append(('-' if desc else '') + field)
+                    index += 1
+                return self.clean_ordering(queryset, names)
+
+            def get_datatables_row(self, obj, fields, context):
+                row = {'DT_RowId': 'row-%s' % obj.pk, 'pk': obj.pk}
+                for field in fields:
+                    row[field] = conditional_escape(
+                        localize(format_value(obj, field)))
+                context['object'] = obj
+                row['actions'] = render_to_string(
+                    'cruds/row_actions.html', context)
+                return row
+
+            def get_datatables_response(self):
+                """
+                Rows of one page for DataTables server-side processing, with
+                the search, filters and perms of the list.
+                """
+                params = self.request.GET
+                try:
+                    draw = int(params.get('draw', 0))
+                    start = max(int(params.get('start', 0)), 0)
+                    length = int(params.get('length', self.paginate_by or 10))
+                except ValueError:
+                    return HttpResponseBadRequest()
+                if length <= 0 or length > self.datatables_max_length:
+                    length = self.datatables_max_length
+
+                queryset = self.get_queryset()
+                ordering = self.get_datatables_ordering(queryset)
+                if ordering:
+                    queryset = queryset.order_by(*ordering)
+                filtered = self.get_paginator(queryset, length).count
+                if self.search_applied or self.filters_applied:
+                    total = self.get_paginator(
+                        self.get_total_queryset(), length).count
+                else:
+                    total = filtered
+
+                fields = list(utils.get_fields(
+                    self.model, include=self.list_fields).keys())
+                context = {
+                    'namespace': self.namespace,
+                    'views_available': self.views_available,
+                    'getparams': '?' + self.getparams + (
+                        '&' if self.getparams else ''),
+                    'url_templates': self.get_url_templates(),
+                }
+                self.get_check_perms(context)
+                return JsonResponse({
+                    'draw': draw,
+                    'recordsTotal': total,
+                    'recordsFiltered': filtered,
+                    'data': [self.get_datatables_row(obj, fields, context)
+                             for obj in queryset[start:start + length]],
+                })
+
+            def get_etag(self):
+                params = sorted(
+                    (key, value) for key, values in self.request.GET.lists()
+                    for value in values)
+                related = sorted((key, value.pk)
+                                 for key, value in self.context_rel.items())
+                # the path tells apart namespaces and inline lists
+                return get_signature(
+                    'list', self.request.path,
+                    get_models_version(self.etag_models), params, related,
+                    self.get_list_cache_scope(), self.get_perms_signature(),
+                    self.template_engine, self.get_template_names(),
+                    translation.get_language(),
+                    timezone.get_current_timezone_name())
+
+            def render_list(self, request, *args, **kwargs):
+                if '_count' in request.GET:
+                    return self.get_count_response()
+                if '_datatables' in request.GET and self.list_datatables:
+                    return self.get_datatables_response()
+                if self.list_streaming:
+                    return self.get_streaming_response()
+                return super(OListView, self).get(request, *args, **kwargs)
+
+            def get_row_chunks(self, object_list):
+                """
+                Yields the rows of the page in lists of streaming_chunk_size,
+                read with iterator() so they are never all in memory.
+                """
+                if isinstance(object_list, models.QuerySet):
+                    prefetch = object_list._prefetch_related_lookups
+                    rows = object_list.iterator(
+                        chunk_size=self.streaming_chunk_size)
+                else:
+                    prefetch = ()
+                    rows = iter(object_list)
+                chunk = []
+                for obj in rows:
+                    chunk.append(obj)
+                    if len(chunk) == self.streaming_chunk_size:
+                        # iterator() does not prefetch
+                        prefetch_related_objects(chunk, *prefetch)
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    prefetch_related_objects(chunk, *prefetch)
+                    yield chunk
+
+            def get_rows_template_names(self):
+                base_name = "%s/%s/" % (self.model._meta.app_label,
+                                        self.model.__name__.lower())
+                return [base_name + 'cruds/list_rows.html',
+                        'cruds/list_rows.html']
+
+            def get_rows_template(self):
+                """
+                The template of the rows, included by the list template
+                and rendered alone for every chunk of a streamed list.
+                """
+                return select_template(self.get_rows_template_names(),
+                                       using=self.template_engine)
+
+            def render_rows(self, template, context, rows):
+                context = dict(context, object_list=rows)
+                if self.row_cache_timeout:
+                    context['row_cache'] = self.get_row_cache(context)
+                return template.render(context, self.request)
+
+            def get_streaming_response(self):
+                """
+                Sends the page before the rows, the rows rendered by chunks
+                with the cruds/list_rows.html template and the rest of the
+                page, memory does not grow with the number of rows.
+                """
+                self.object_list = self.get_queryset()
+                context = self.get_context_data()
+                chunks = self.get_row_chunks(context['object_list'])
+                rows = next(chunks, [])
+                # the first chunk tells the page if there are rows
+                context['object_list'] = rows
+                context['list_streaming'] = LIST_ROWS_MARKER
+                page = render_to_string(
+                    self.get_template_names(), context, self.request,
+                    using=self.template_engine)
+                head, marker, foot = page.partition(LIST_ROWS_MARKER)
+                if rows and not marker:
+                    raise ImproperlyConfigured(
+                        "The list template of %s renders no list_streaming "
+                        "in its tbody" % self.model.__name__)
+                template = self.get_rows_template()
+
+                def stream(rows):
+                    yield head
+                    while rows:
+                        yield self.render_rows(template, context, rows)
+                        rows = next(chunks, None)
+                    yield foot
+                return StreamingHttpResponse(stream(rows))
+
+            def get(self, request, *args, **kwargs):
+                if self.conditional_get:
+                    return self.render_conditional(
+                        self.render_list, request, *args, **kwargs)
+                return self.render_list(request, *args, **kwargs)
+
+            def get_allowed_actions(self):
+                return [action for action in self.list_actions
+                        if action.has_perm(self, self.request.user)]
+
+            def post(self, request, *args, **kwargs):
+                """
+                Runs a list action over the checked rows in one query and
+                transaction, rows hidden by search, filters or
+                get_queryset are never touched.
+                """
+                actions = dict((action.name, action)
+                               for action in self.list_actions)
+                action = actions.get(request.POST.get('action'))
+                if action is None:
+                    return HttpResponseBadRequest()
+                if not action.has_perm(self, request.user):
+                    return HttpResponseForbidden()
+                try:
+                    pks = [self.model._meta.pk.to_python(pk)
+                           for pk in request.POST.getlist('pks') if pk]
+                except ValidationError:
+                    return HttpResponseBadRequest()
+                if pks:
+                    queryset = self.get_queryset().filter(
+                        pk__in=pks).order_by()
+                    with transaction.atomic(
+                            using=router.db_for_write(self.model)):
+                        action.execute(self, queryset)
+                    # update() sends no signals, the list cache, the row
+                    # cache and the ETags would keep the old rows
+                    if self.list_cache_models or self.conditional_get:
+                        bump_model_version(self.model)
+                    if self.row_cache_timeout or self.conditional_get:
+                        for pk in pks:
+                            evict_row(self.model, pk)
+                return HttpResponseRedirect(request.get_full_path())
+
+            def get_url_templates(self):
+                """
+                Row urls reversed once per page, see utils.UrlTemplate.
+                """
+                return utils.get_url_templates(
+                    self.model, utils.INSTANCE_ACTIONS, self.namespace)
+
+            def get_row_cache_signature(self, context):
+                """
+                Everything a cached row depends on besides the row itself:
+                columns, permissions, urls, language and time zone.
+                """
+                return get_cache_key(
+                    'row_signature', self.model._meta.label_lower,
+                    self.template_engine, self.get_template_names(),
+                    list(context['fields'].items()),
+                    sorted(context['crud_perms'].items()),
+                    context['views_available'], context['namespace'],
+                    context['getparams'], bool(context['list_actions']),
+                    translation.get_language(),
+                    timezone.get_current_timezone_name(),
+                    get_models_version(self.row_cache_models))
+
+            def get_row_cache(self, context):
+                """
+                Returns the RowCache of the rows in the page, keyed by
+                primary key, row version (and row_version_field) and
+                signature.
+                """
+                objects = list(context.get('object_list') or [])
+                signature = self.get_row_cache_signature(context)
+                versions = get_row_versions(
+                    self.model, [obj.pk for obj in objects])
+                keys = {}
+                for obj in objects:
+                    version = versions[obj.pk]
+                    if self.row_version_field:
+                        version = (version, getattr(
+                            obj, self.row_version_field))
+                    keys[obj.pk] = get_cache_key(
+                        'row', self.model._meta.label_lower, obj.pk,
+                        version, signature)
+                return RowCache(keys, self.row_cache_timeout)
+
+            def get_context_data(self, **kwargs):
+                context = super(OListView, self).get_context_data(**kwargs)
+                params = self.request.GET.copy()
+                params['_count'] = 1
+                context['list_path'] = self.request.path
+                context['list_actions'] = self.get_allowed_actions()
+                context['list_rows_template'] = \
+                    self.get_rows_template().origin.template_name
+                context['url_templates'] = self.get_url_templates()
+                context['sort_headers'] = self.get_sort_headers(
+                    context['fields'], context['sortparams'])
+                if self.request.GET.get('o'):
+                    context['pageparams'] += urlencode(
+                        {'o': self.request.GET['o']}) + '&'
+                if self.list_datatables:
+                    context['datatables_url'] = '%s%s_datatables=1' % (
+                        context['list_path'], context['getparams'])
+                    context['datatables_sortable'] = \
+                        self.get_sortable_fields()
+                    # rows already rendered, keyset pages have no count
+                    paginator = context.get('paginator')
+                    if self.pagination_mode != 'keyset' and paginator and \
+                            not paginator.deferred:
+                        context['datatables_count'] = paginator.count
+                context['count_url'] = '%s?%s' % (context['list_path'],
+                                                  params.urlencode())
+                if self.row_cache_timeout and not self.list_streaming:
+                    # streamed lists read the cache of every chunk
+                    context['row_cache'] = self.get_row_cache(context)
+                return context
+
+            def paginate_queryset(self, queryset, page_size):
+                if self.pagination_mode != 'keyset':
+                    if self.list_cache_timeout:
+                        return self.paginate_cached_queryset(
+                            queryset, page_size)
+                    return super(OListView, self).paginate_queryset(
+                        queryset, page_size)
+                paginator = KeysetPaginator(queryset, page_size)
+                page = paginator.page(after=self.request.GET.get('after'),
+                                      before=self.request.GET.get('before'))
+                return (paginator, page, page.object_list,
+                        page.has_other_pages())
+
         return OListView
 
+    def get_export_view(self):
+        OListView = self.get_list_view()
+
+        class OExportView(OListView):
+            """
+            Streams the rows of the list, with the same search, filters and
+            permissions, as CSV (default) or JSON lines (``?format=jsonl``).
+            """
+            export_fields = self.export_fields
+            export_chunk_size = self.export_chunk_size
+            http_method_names = ['get', 'head']
+
+            def get_export_fields(self):
+                return utils.get_export_fields(
+                    self.model, self.export_fields or self.list_fields)
+
+            def get_export_rows(self):
+                fields = self.get_export_fields()
+                queryset = self.get_queryset()
+                return queryset.prefetch_related(None).values_list(
+                    *fields).iterator(chunk_size=self.export_chunk_size)
+
+            def get_csv_lines(self, fields, rows):
+                buffer = utils.Echo()
+                writer = csv.writer(buffer)
+                names = utils.get_fields(self.model, include=fields)
+                yield writer.writerow([six.text_type(names[field][0])
+                                       for field in fields])
+                for row in rows:
+                    yield writer.writerow(row)
+
+            def get_jsonl_lines(self, fields, rows):
+                for row in rows:
+                    yield json.dumps(dict(zip(fields, row)),
+                                     cls=DjangoJSONEncoder) + '\n'
+
+            def get(self, request, *args, **kwargs):
+                export_format = request.GET.get('format', 'csv')
+                if export_format not in ('csv', 'jsonl'):
+                    return HttpResponseBadRequest()
+                fields = self.get_export_fields()
+                rows = self.get_export_rows()
+                if export_format == 'csv':
+                    response = StreamingHttpResponse(
+                        self.get_csv_lines(fields, rows),
+                        content_type='text/csv; charset=utf-8')
+                else:
+                    response = StreamingHttpResponse(
+                        self.get_jsonl_lines(fields, rows),
+                        content_type='application/x-ndjson')
+                response['Content-Disposition'] = \
+                    'attachment; filename="%s.%s"' % (
+                        self.model.__name__.lower(), export_format)
+                return response
+        return OExportView
+
     def get_delete_view_class(self):
         return DeleteView
 
     def get_delete_view(self):
         ODeleteClass = self.get_delete_view_class()
 
-        class ODeleteView(CRUDMixin, ODeleteClass):
+        class ODeleteView(CRUDObjectMixin, ODeleteClass):
             namespace = self.namespace
             perms = self.perms['delete']
             all_perms = self.perms
@@ -720,6 +1588,13 @@ class CRUDView(object):
             template_name=basename
         ))
 
+    def initialize_export(self, basename):
+        OExportView = self.get_export_view()
+        self.export = self.decorator_export(OExportView.as_view(
+            model=self.model,
+            template_name=basename
+        ))
+
     def initialize_delete(self, basename):
         ODeleteView = self.get_delete_view()
         url = utils.crud_url_name(
@@ -804,6 +1679,9 @@ class CRUDView(object):
         if 'list' in self.views_available:
             self.initialize_list(basename + '/list.html')
 
+        if 'export' in self.views_available:
+            self.initialize_export(basename + '/list.html')
+
         if 'delete' in self.views_available:
             self.initialize_delete(basename + '/delete.html')
 
@@ -829,6 +1707,12 @@ class CRUDView(object):
                               name=utils.crud_url_name(
                                   self.model, 'create', prefix=self.urlprefix))
                           )
+        if 'export' in self.views_available:
+            myurls.append(url("^%s/export$" % (base_name,),
+                              self.export,
+                              name=utils.crud_url_name(
+                                  self.model, 'export', prefix=self.urlprefix))
+                          )
         if 'detail' in self.views_available:
             myurls.append(url('^%s/(?P<pk>[^/]+)$' % (base_name,),
                               self.detail,
@@ -1025,7 +1909,7 @@ class JSONView(CRUDView, object):
     def get_update_view(self):
         EditViewClass = self.get_update_view_class()
 
-        class OEditView(CRUDMixin, EditViewClass):
+        class OEditView(CRUDObjectMixin, EditViewClass):
             namespace = self.namespace
             perms = self.perms['update']
             form_class = self.update_form
@@ -1085,26 +1969,9 @@ class JSONView(CRUDView, object):
                 else:
                     context['fields'] = utils.get_fields(self.model, include=include)
 
-                if hasattr(self, 'object') and self.object:
-                    for action in utils.INSTANCE_ACTIONS:
-                        try:
-                            nurl = utils.crud_url_name(self.model, action)
-                            if self.namespace:
-                                nurl = self.namespace + ':' + nurl
-                            url = reverse(nurl, kwargs={'pk': self.object.pk})
-                        except NoReverseMatch:
-                            url = None
-                        context['url_%s' % action] = url
-
-                for action in utils.LIST_ACTIONS:
-                    try:
-                        nurl = utils.crud_url_name(self.model, action)
-                        if self.namespace:
-                            nurl = self.namespace + ':' + nurl
-                        url = reverse(nurl)
-                    except NoReverseMatch:
-                        url = None
-                    context['url_%s' % action] = url
+                obj = getattr(self, 'object', None)
+                context.update(utils.get_action_urls(
+                    self.model, self.namespace, obj.pk if obj else None))
 
                 context['url_list'] = str(os.sep).join([ x for x in self.request.path.split(os.sep) if not utils.is_number(x) ]).replace('update', 'list')
                 context['url_detail'] = self.request.path.replace('update', 'detail')
@@ -3,6 +3,8 @@ from django.core.exceptions import FieldDoesNotExist
 from django.forms.models import modelform_factory
 from django.db import models
 
+from cruds_adminlte.utils import get_lookup_filter
+
 
 class FormFilter:
     form = None
@@ -34,10 +36,15 @@ class FormFilter:
     def render(self):
         return self.form_instance
 
+    @property
+    def media(self):
+        return self.form_instance.media
+
     def get_filter(self, queryset):
         clean_value = self.get_cleaned_fields()
-        if clean_value:
-            queryset = queryset.filter(**clean_value)
+        for lookup, value in clean_value.items():
+            queryset = queryset.filter(
+                get_lookup_filter(queryset.model, lookup, value))
         return queryset
 
     def get_build_param(self, value, data, params):
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Value formatters used by the ``format_value`` filter, ``crud_fields`` and
+the list columns. The formatter of a model field path is built once and
+kept for the process, the work of finding out how to display the value
+(choices, files, related objects) is not repeated for every cell.
+"""
+from __future__ import unicode_literals
+
+import os.path
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from cruds_adminlte import utils
+
+# field class, or (model, field path), -> callable taking the value
+FORMATTERS = {}
+
+# (model, field path) -> compiled formatter
+_formatters = {}
+
+
+def register_formatter(key, formatter):
+    """
+    Sets the formatter of a model field class (its subclasses too) or of a
+    ``(model, field path)`` tuple. formatter takes the value and returns
+    what is displayed::
+
+        register_formatter(models.DecimalField, lambda value: '%.2f' % value)
+        register_formatter((Invoice, 'customer__name'), str.upper)
+    """
+    FORMATTERS[key] = formatter
+    _formatters.clear()
+
+
+def get_instance_url(value):
+    url = utils.reverse_instance_url(
+        utils.crud_url_name(type(value), utils.ACTION_UPDATE), value.pk)
+    if url is not None:
+        return url
+    if hasattr(value, 'get_absolute_url'):
+        return value.get_absolute_url()
+    return None
+
+
+def format_instance(value):
+    if value is None:
+        return ''
+    url = get_instance_url(value)
+    if url:
+        return mark_safe('<a href="%s">%s</a>' % (url, escape(value)))
+    return value
+
+
+def format_file(value):
+    if value:
+        return mark_safe('<a href="%s">%s</a>' % (
+            value.url,
+            os.path.basename(value.name),
+        ))
+    return ''
+
+
+def format_plain(value):
+    if value is None:
+        return ''
+    return value
+
+
+def format_attribute(obj, field_name):
+    """
+    Formats any attribute, checking the type of the value at runtime. Used
+    for objects that are not model instances and for names that are not
+    model fields.
+    """
+    if '__' in field_name:
+        related_model, field_name = field_name.split('__', 1)
+        obj = getattr(obj, related_model)
+    display_func = getattr(obj, 'get_%s_display' % field_name, None)
+    if display_func:
+        return display_func()
+    value = getattr(obj, field_name)
+
+    if isinstance(value, models.fields.files.FieldFile):
+        return format_file(value)
+    if isinstance(value, models.Model):
+        return format_instance(value)
+    return format_plain(value)
+
+
+def get_registered_formatter(model, field_name, field):
+    if (model, field_name) in FORMATTERS:
+        return FORMATTERS[(model, field_name)]
+    for cls in type(field).__mro__ if field is not None else ():
+        if cls in FORMATTERS:
+            return FORMATTERS[cls]
+    return None
+
+
+def compile_formatter(model, field_name):
+    """
+    Builds the formatter of field_name (a field, or a path through single
+    valued relations, of model), a callable taking the object.
+    """
+    parts = field_name.split('__')
+    path, name = parts[:-1], parts[-1]
+    owner = model
+    for part in path:
+        try:
+            field = owner._meta.get_field(part)
+        except FieldDoesNotExist:
+            return lambda obj: format_attribute(obj, field_name)
+        if not (field.many_to_one or field.one_to_one):
+            return lambda obj: format_attribute(obj, field_name)
+        owner = field.related_model
+    try:
+        field = owner._meta.get_field(name)
+    except FieldDoesNotExist:
+        field = None
+
+    custom = get_registered_formatter(model, field_name, field)
+    display = 'get_%s_display' % name
+    if custom is not None:
+        def format_value(obj):
+            return custom(getattr(obj, name))
+    elif hasattr(owner, display):
+        def format_value(obj):
+            return getattr(obj, display)()
+    elif field is None:
+        def format_value(obj):
+            return format_attribute(obj, name)
+    elif isinstance(field, models.FileField):
+        def format_value(obj):
+            return format_file(getattr(obj, name))
+    elif field.is_relation and (field.many_to_one or field.one_to_one):
+        def format_value(obj):
+            return format_instance(getattr(obj, name))
+    else:
+        def format_value(obj):
+            return format_plain(getattr(obj, name))
+
+    if not path:
+        return format_value
+
+    def follow(obj):
+        for part in path:
+            obj = getattr(obj, part)
+            if obj is None:
+                return ''
+        return format_value(obj)
+    return follow
+
+
+def get_formatter(model, field_name):
+    """
+    Returns the formatter of model field_name, built on first use.
+    """
+    key = (model, field_name)
+    try:
+        return _formatters[key]
+    except KeyError:
+        formatter = _formatters[key] = compile_formatter(model, field_name)
+        return formatter
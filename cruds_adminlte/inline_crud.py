@@ -143,6 +143,11 @@ class InlineAjaxCRUD(CRUDView):
                 context['views_available'] = self.views_available
                 return context
 
+            def get_url_templates(self):
+                return utils.get_url_templates(
+                    self.model, utils.INSTANCE_ACTIONS, self.namespace,
+                    model_id=self.model_id.pk)
+
             def get_queryset(self):
                 queryset = super(ListView, self).get_queryset()
                 params = {
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Jinja2 environment for the CRUD templates shipped in
+``cruds_adminlte/jinja2``, with the helpers of ``crud_tags``::
+
+    TEMPLATES = [
+        {
+            'BACKEND': 'django.template.backends.jinja2.Jinja2',
+            'APP_DIRS': True,
+            'OPTIONS': {'environment': 'cruds_adminlte.jinja.environment'},
+        },
+        {
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            ...
+        },
+    ]
+
+and ``template_engine = 'jinja2'`` (the engine alias) in your CRUDView.
+"""
+from __future__ import unicode_literals
+
+import os.path
+
+import six
+from django.template import Context
+from django.template.loader import render_to_string
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import translation
+from django.utils.formats import localize
+from django.utils.html import escapejs
+
+from cruds_adminlte import bundles, columns
+from cruds_adminlte.pagination import get_page_window
+from cruds_adminlte.templatetags import crud_tags
+
+try:
+    from jinja2 import Environment, TemplateNotFound
+    from markupsafe import Markup
+    try:
+        from jinja2 import pass_context
+    except ImportError:  # Jinja2 < 3.0
+        from jinja2 import contextfunction as pass_context
+except ImportError:  # pragma: no cover
+    Environment = None
+
+BUILTIN_JINJA2_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'jinja2')
+
+# python column renderers get a context without variables, just the
+# autoescape and localization flags of render_value_in_context
+RENDERER_CONTEXT = Context()
+
+
+def crud_row_url(context, obj, action):
+    url_template = (context.get('url_templates') or {}).get(action)
+    if url_template is not None:
+        return url_template.format(obj.pk)
+    base_model = context.get('base_model')
+    if base_model is not None and not isinstance(base_model, type):
+        return crud_tags.crud_inline_url(base_model, obj, action,
+                                         context.get('namespace'))
+    return crud_tags.crud_url(obj, action, context.get('namespace'))
+
+
+def crud_fields(context, obj, fields=None):
+    """
+    Table rows with the fields of obj, like the crud_fields tag.
+    """
+    tag_context = crud_tags.crud_fields(obj, fields)
+    template = context.environment.get_template(
+        'cruds/templatetags/crud_fields.html')
+    return Markup(template.render(tag_context))
+
+
+class JinjaColumn(object):
+
+    def __init__(self, template):
+        self.template = template
+
+    def __call__(self, obj, field, context):
+        return Markup(self.template.render(object=obj, field=field))
+
+
+def get_column_renderer(environment, field_type):
+    """
+    A ``cruds/columns`` Jinja2 template of your project wins over the python
+    renderer of the type, like in Django templates.
+    """
+    renderers = environment.cruds_column_renderers
+    field_type = field_type.lower()
+    if field_type not in renderers:
+        try:
+            template = environment.get_template(
+                columns.COLUMN_TEMPLATE % field_type)
+        except TemplateNotFound:
+            template = None
+        if template is not None and not os.path.abspath(
+                template.filename or '').startswith(BUILTIN_JINJA2_DIR):
+            renderers[field_type] = JinjaColumn(template)
+        else:
+            renderers[field_type] = columns.COLUMN_RENDERERS.get(
+                field_type, columns.render_default)
+    return renderers[field_type]
+
+
+def render_column(context, obj, field, field_type):
+    renderer = get_column_renderer(context.environment, field_type)
+    return Markup(renderer(obj, field, RENDERER_CONTEXT))
+
+
+def cache_row(context, obj, html):
+    """
+    Keeps html, the rendered row of obj, in the row cache of the list.
+    """
+    row_cache = context.get('row_cache')
+    if row_cache is not None:
+        row_cache.set(obj, html)
+    return Markup(html)
+
+
+def include_django(context, template_name):
+    """
+    Renders a Django template (adminlte header, sidebar...) with the
+    variables of the page.
+    """
+    return Markup(render_to_string(
+        template_name, context.get_all(), request=context.get('request')))
+
+
+def crud_bundles(*args):
+    """
+    Links the static bundles like the crud_bundles tag, pages call it once
+    for every group of bundles.
+    """
+    names = [arg for arg in args if isinstance(arg, six.string_types)]
+    # undefined variables (filters of detail pages) are falsy
+    objects = [arg for arg in args
+               if arg and not isinstance(arg, six.string_types)]
+    return Markup(bundles.render_bundles(names, objects, set()))
+
+
+def environment(**options):
+    if Environment is None:
+        from django.core.exceptions import ImproperlyConfigured
+        raise ImproperlyConfigured(
+            "Jinja2 is needed to render cruds_adminlte templates with "
+            "Jinja2, pip install Jinja2")
+    extensions = list(options.pop('extensions', []))
+    if 'jinja2.ext.i18n' not in extensions:
+        extensions.append('jinja2.ext.i18n')
+    env = Environment(extensions=extensions, **options)
+    env.install_gettext_translations(translation, newstyle=True)
+    env.cruds_column_renderers = {}
+    env.globals.update({
+        'static': static,
+        'url': lambda name, *args, **kwargs: reverse(
+            name, args=args, kwargs=kwargs),
+        'crud_url': crud_tags.crud_url,
+        'crud_inline_url': crud_tags.crud_inline_url,
+        'crud_bundles': crud_bundles,
+        'crud_row_url': pass_context(crud_row_url),
+        'crud_fields': pass_context(crud_fields),
+        'format_value': crud_tags.format_value,
+        'get_attr': crud_tags.get_attr,
+        'render_column': pass_context(render_column),
+        'cache_row': pass_context(cache_row),
+        'include_django': pass_context(include_django),
+        'page_window': get_page_window,
+    })
+    env.filters.update({
+        'format_value': crud_tags.format_value,
+        'get_attr': crud_tags.get_attr,
+        'escapejs': escapejs,
+        'localize': localize,
+    })
+    return env
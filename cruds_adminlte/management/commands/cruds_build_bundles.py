@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cruds_adminlte.bundles import BUNDLES, build_bundles
+
+
+class Command(BaseCommand):
+    help = ("Builds the minified, hashed and compressed static bundles of "
+            "the CRUD pages in STATIC_ROOT.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'bundles', nargs='*', metavar='bundle',
+            help="Only build these bundles.")
+
+    def handle(self, *args, **options):
+        if not settings.STATIC_ROOT:
+            raise CommandError("Bundles are built in STATIC_ROOT, set it.")
+        names = options['bundles']
+        unknown = set(names) - set(BUNDLES)
+        if unknown:
+            raise CommandError(
+                "Unknown bundles %s" % ', '.join(sorted(unknown)))
+        try:
+            manifest = build_bundles(names)
+        except ValueError as e:
+            raise CommandError(e)
+        for name in BUNDLES:
+            if names and name not in names:
+                continue
+            for kind in ('css', 'js'):
+                if kind in manifest[name]:
+                    self.stdout.write("Built %s" % manifest[name][kind])
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cruds_adminlte.search import get_registered_backends
+
+
+class Command(BaseCommand):
+    help = "Builds or rebuilds the full text indexes used by CRUD search."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.Model',
+            help="Only rebuild the indexes of these models.")
+
+    def handle(self, *args, **options):
+        # CRUDViews are instantiated in urls, loading them registers backends
+        import_module(settings.ROOT_URLCONF)
+        backends = get_registered_backends()
+        labels = set(label.lower() for label in options['models'])
+        if labels:
+            backends = [backend for backend in backends
+                        if backend.model._meta.label_lower in labels]
+            found = set(backend.model._meta.label_lower
+                        for backend in backends)
+            if labels - found:
+                raise CommandError(
+                    "No full text search backend for %s" % ', '.join(
+                        sorted(labels - found)))
+        for backend in backends:
+            backend.rebuild_index()
+            self.stdout.write("Rebuilt %s for %s" % (
+                backend.index_name, backend.model._meta.label))
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import json
+
+import six
+
+from django.core.cache import cache
+from django.core.exceptions import (FieldDoesNotExist, ImproperlyConfigured,
+                                    ValidationError, EmptyResultSet)
+from django.core.paginator import Paginator, Page, PageNotAnInteger, EmptyPage
+from django.db import connections
+from django.db.models import F
+from django.db.models.query_utils import Q
+from django.utils.formats import number_format
+from django.utils.functional import cached_property
+from django.utils.translation import ugettext_lazy as _
+
+COUNT_EXACT = 'exact'
+COUNT_CAPPED = 'capped'
+COUNT_ESTIMATED = 'estimated'
+COUNT_DEFERRED = 'deferred'
+
+COUNT_STRATEGIES = (
+    COUNT_EXACT,
+    COUNT_CAPPED,
+    COUNT_ESTIMATED,
+    COUNT_DEFERRED,
+)
+
+
+def get_page_window(page, on_each_side=3, on_ends=1):
+    """
+    Returns the page numbers to link around ``page``: the first and last
+    ``on_ends`` pages, ``on_each_side`` pages around the current one and
+    ``None`` where pages are elided. Only the numbers shown are built, the
+    paginator page_range is never materialized.
+
+    Paginators with deferred counts do not know the last page, the window
+    ends with the next page if there is one.
+    """
+    number = page.number
+    if getattr(page.paginator, 'deferred', False):
+        last = number + 1 if page.has_next() else number
+        tail = []
+    else:
+        last = page.paginator.num_pages
+        tail = range(max(1, last - on_ends + 1), last + 1)
+    numbers = set(range(1, min(on_ends, last) + 1))
+    numbers.update(range(max(1, number - on_each_side),
+                         min(last, number + on_each_side) + 1))
+    numbers.update(tail)
+
+    window = []
+    previous = 0
+    for npage in sorted(numbers):
+        if npage - previous == 2:
+            window.append(npage - 1)
+        elif npage - previous > 2:
+            window.append(None)
+        window.append(npage)
+        previous = npage
+    return window
+
+
+def get_estimated_count(queryset):
+    """
+    Returns the planner row estimate for queryset or None when the database
+    backend does not provide one.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, six.string_types):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class DeferredPage(Page):
+    """
+    Page of a paginator that does not know the total, the next page is
+    detected fetching one extra row.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super(DeferredPage, self).__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def end_index(self):
+        return (self.number - 1) * self.paginator.per_page + \
+            len(self.object_list)
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Paginator with a pluggable way to count rows:
+
+    * ``exact``: ``COUNT(*)`` as django Paginator does.
+    * ``capped``: counts at most ``cap`` rows, pages stop there.
+    * ``estimated``: uses the database planner estimate when it is bigger
+      than ``cap``, exact count otherwise (and on backends without estimates).
+    * ``deferred``: does not count at all, the total is loaded later.
+
+    Counts other than ``exact`` are cached ``cache_timeout`` seconds by
+    the SQL of the counted queryset and ``cache_version``, the version of
+    the data counted.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, strategy=COUNT_EXACT,
+                 cap=10000, cache_timeout=None, cache_version=None):
+        if strategy not in COUNT_STRATEGIES:
+            raise ImproperlyConfigured(
+                "Unknown count strategy %r, use one of %s" % (
+                    strategy, ', '.join(COUNT_STRATEGIES)))
+        super(CountStrategyPaginator, self).__init__(
+            object_list, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page)
+        self.strategy = strategy
+        self.cap = int(cap)
+        self.cache_timeout = cache_timeout
+        self.cache_version = cache_version
+        self.capped = False
+        self.estimated = False
+
+    @property
+    def deferred(self):
+        return self.strategy == COUNT_DEFERRED
+
+    def get_cache_key(self):
+        if not self.cache_timeout or self.strategy == COUNT_EXACT:
+            return None
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except (AttributeError, EmptyResultSet):
+            return None
+        signature = '%s|%s|%s|%r|%s' % (self.strategy, self.cap, sql, params,
+                                        self.cache_version)
+        return 'cruds_adminlte:count:%s' % hashlib.md5(
+            signature.encode('utf-8')).hexdigest()
+
+    def get_count(self):
+        if self.strategy == COUNT_CAPPED:
+            count = self.object_list.values('pk')[:self.cap + 1].count()
+            if count > self.cap:
+                return self.cap, True, False
+            return count, False, False
+        if self.strategy == COUNT_ESTIMATED:
+            estimate = get_estimated_count(self.object_list)
+            if estimate is not None and estimate > self.cap:
+                return estimate, False, True
+        return super(CountStrategyPaginator, self).count, False, False
+
+    @cached_property
+    def count(self):
+        key = self.get_cache_key()
+        result = cache.get(key) if key else None
+        if result is None:
+            result = self.get_count()
+            if key:
+                cache.set(key, result, self.cache_timeout)
+        count, self.capped, self.estimated = result
+        return count
+
+    def set_count(self, count, capped=False, estimated=False):
+        """
+        Sets a count known beforehand, the database is not asked.
+        """
+        self.__dict__['count'] = count
+        self.capped = capped
+        self.estimated = estimated
+
+    @property
+    def count_display(self):
+        count = number_format(self.count, force_grouping=True)
+        if self.capped:
+            return '%s+' % count
+        if self.estimated:
+            return '~%s' % count
+        return count
+
+    def validate_number(self, number):
+        if not self.deferred:
+            return super(CountStrategyPaginator, self).validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        if not self.deferred:
+            return super(CountStrategyPaginator, self).page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        has_next = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not object_list and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return DeferredPage(object_list, number, self, has_next)
+
+
+def get_ordering(queryset):
+    """
+    Returns the queryset ordering as a list of ``(field, descending)``
+    tuples, always ending with the primary key so rows have a total order.
+    """
+    ordering = queryset.query.order_by or queryset.model._meta.ordering or []
+    pk_name = queryset.model._meta.pk.name
+    result = []
+    for field in ordering:
+        if not isinstance(field, six.string_types) or field == '?':
+            raise ImproperlyConfigured(
+                "Keyset pagination needs plain field names as ordering, "
+                "got %r" % (field,))
+        descending = field.startswith('-')
+        field = field.lstrip('-+')
+        if field == 'pk':
+            field = pk_name
+        result.append((field, descending))
+        if field == pk_name:
+            break
+    if not result or result[-1][0] != pk_name:
+        result.append((pk_name, result[-1][1] if result else False))
+    return result
+
+
+def is_nullable(model, path):
+    """
+    True when the field path (``author__name``) may be NULL, for nullable
+    fields and relations that may not exist. Unknown paths are nullable.
+    """
+    opts = model._meta
+    for part in path.split('__'):
+        try:
+            field = opts.pk if part == 'pk' else opts.get_field(part)
+        except FieldDoesNotExist:
+            return True
+        if field.null:
+            return True
+        if not field.is_relation or field.related_model is None:
+            return False
+        opts = field.related_model._meta
+    return False
+
+
+class KeysetPage(object):
+    """
+    A page of a :class:`KeysetPaginator`, the cursors are the primary keys of
+    the first and last rows and are used as ``before`` and ``after`` GET
+    parameters to move to the previous and next pages.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Keyset page of %s rows>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return self.object_list[-1].pk
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return self.object_list[0].pk
+
+
+class KeysetPaginator(object):
+    """
+    Seek paginator, instead of ``OFFSET`` every page is fetched with
+    ``WHERE (ordering, pk) > (values of the last row seen)`` so deep pages
+    cost the same as the first one.
+
+    NULL values of nullable ordering fields are sorted as the greatest
+    ones (last ascending, first descending) on every database, and sought
+    with ``isnull``.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.ordering = get_ordering(queryset)
+        self.nullable = set(field for field, descending in self.ordering
+                            if is_nullable(queryset.model, field))
+        self.queryset = queryset.order_by(*self.get_order_by())
+        self.per_page = int(per_page)
+
+    def get_order_by(self, reverse=False):
+        order_by = []
+        for field, descending in self.ordering:
+            descending = descending != reverse
+            if field not in self.nullable:
+                order_by.append(('-' if descending else '') + field)
+            elif descending:
+                order_by.append(F(field).desc(nulls_first=True))
+            else:
+                order_by.append(F(field).asc(nulls_last=True))
+        return order_by
+
+    def get_cursor_values(self, cursor):
+        fields = [field for field, descending in self.ordering]
+        try:
+            return self.queryset.model._default_manager.filter(
+                pk=cursor).values_list(*fields).first()
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def get_equal_filter(self, field, value):
+        if value is None:
+            return Q(**{'%s__isnull' % field: True})
+        return Q(**{field: value})
+
+    def get_beyond_filter(self, field, value, greater):
+        """
+        Rows with field past value in the direction of the seek, None when
+        there can be none (nothing is greater than NULL).
+        """
+        if value is None:
+            return None if greater else Q(**{'%s__isnull' % field: False})
+        condition = Q(**{'%s__%s' % (field, 'gt' if greater else 'lt'):
+                         value})
+        if greater and field in self.nullable:
+            condition |= Q(**{'%s__isnull' % field: True})
+        return condition
+
+    def get_seek_filter(self, values, reverse=False):
+        seek = None
+        for index, (field, descending) in enumerate(self.ordering):
+            condition = self.get_beyond_filter(
+                field, values[index], descending == reverse)
+            if condition is None:
+                continue
+            for previous in range(index):
+                condition &= self.get_equal_filter(
+                    self.ordering[previous][0], values[previous])
+            seek = condition if seek is None else seek | condition
+        return seek if seek is not None else Q(pk__in=[])
+
+    def page(self, after=None, before=None):
+        reverse = not after and bool(before)
+        cursor = before if reverse else after
+        queryset = self.queryset
+        values = self.get_cursor_values(cursor) if cursor else None
+        if reverse and values is None:
+            return self.page()
+        if values is not None:
+            queryset = queryset.filter(self.get_seek_filter(values, reverse))
+        if reverse:
+            queryset = queryset.order_by(*self.get_order_by(reverse=True))
+
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+            return KeysetPage(object_list, self, True, has_more)
+        return KeysetPage(object_list, self, has_more, values is not None)
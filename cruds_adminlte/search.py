@@ -0,0 +1,536 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import re
+
+import six
+
+from django.core.exceptions import (FieldDoesNotExist, ImproperlyConfigured,
+                                    ValidationError)
+from django.db import connections, models, router
+from django.db.models.expressions import RawSQL
+from django.db.models.query_utils import Q
+from django.db.models.signals import post_save, post_delete
+from django.utils.module_loading import import_string
+
+from cruds_adminlte.utils import get_lookup_filter
+
+
+class RawSubquery(RawSQL):
+    """
+    Raw ``SELECT`` usable as right hand side of an ``__in`` lookup.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+class SearchTerm(object):
+    """
+    A word or quoted phrase of the search text, ``field`` is set when the
+    term was written as ``field:value``.
+    """
+
+    def __init__(self, value, field=None):
+        self.value = value
+        self.field = field
+
+    def __repr__(self):
+        if self.field:
+            return '<SearchTerm %s:%r>' % (self.field, self.value)
+        return '<SearchTerm %r>' % (self.value,)
+
+    def __eq__(self, other):
+        return isinstance(other, SearchTerm) and \
+            (self.value, self.field) == (other.value, other.field)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.value, self.field))
+
+
+TERM_RE = re.compile(r'(?:([\w.]+):)?(?:"([^"]*)"?|(\S+))', re.UNICODE)
+
+
+def get_field_names(search_fields):
+    """
+    Returns the names usable as ``field:`` prefix, search_fields paths
+    without their lookups, ``author__name`` and ``author`` for
+    ``author__name__icontains``.
+    """
+    names = set()
+    for lookup in search_fields:
+        parts = lookup.split('__')
+        for index in range(1, len(parts) + 1):
+            names.add('__'.join(parts[:index]))
+    return names
+
+
+def field_matches(lookup, name):
+    return lookup == name or lookup.startswith(name + '__')
+
+
+def parse_search(text, split=' ', search_fields=None):
+    """
+    Splits the search text into a list of :class:`SearchTerm`, without
+    repetitions. With ``split`` set to whitespace quoted phrases are kept
+    together. ``field:value`` restricts a term to the search_fields
+    starting with field, unknown prefixes are searched as plain text.
+    """
+    text = (text or '').strip()
+    if not text:
+        return []
+    if not split:
+        return [SearchTerm(text)]
+
+    names = get_field_names(search_fields or [])
+    if split.isspace():
+        pieces = [(field, phrase or word)
+                  for field, phrase, word in TERM_RE.findall(text)]
+    else:
+        pieces = []
+        for piece in text.split(split):
+            field, sep, value = piece.strip().partition(':')
+            if not sep:
+                field, value = '', field
+            pieces.append((field, value.strip().strip('"')))
+
+    terms = []
+    seen = set()
+    for field, value in pieces:
+        if field and field not in names:
+            value = '%s:%s' % (field, value)
+            field = ''
+        if not value:
+            continue
+        key = (field, value.lower())
+        if key not in seen:
+            seen.add(key)
+            terms.append(SearchTerm(value, field or None))
+    return terms
+
+
+class ORMSearchBackend(object):
+    """
+    Searches with the ORM, every term has to match one of the search fields
+    (an AND of ORs).
+
+    search_fields with a lookup (``name__icontains``) are used as they are.
+    For plain field names the lookup is chosen so indexes can be used:
+    ``exact`` for fields that are not text (terms that are not valid values
+    are skipped), ``istartswith`` for indexed or short text fields and
+    ``icontains`` for the rest.
+    """
+    short_field_length = 32
+
+    def __init__(self, model, search_fields):
+        self.model = model
+        self.search_fields = search_fields or []
+
+    def resolve(self, lookup):
+        """
+        Returns ``(field, has_lookup)`` for a search_fields entry.
+        """
+        opts = self.model._meta
+        field = None
+        for part in lookup.split('__'):
+            if opts is None:
+                return field, True
+            try:
+                field = opts.pk if part == 'pk' else opts.get_field(part)
+            except FieldDoesNotExist:
+                return field, True
+            opts = field.related_model._meta if field.is_relation and \
+                field.related_model else None
+        return field, False
+
+    def get_lookup(self, lookup, value):
+        """
+        Returns the ``(lookup, value)`` to filter lookup by value or None
+        when the value can not match the field.
+        """
+        field, has_lookup = self.resolve(lookup)
+        if has_lookup or field is None:
+            return lookup, value
+        if field.is_relation:
+            # the value is looked up in the field of the related model the
+            # relation points to, lookups can not go on the relation
+            if field.many_to_many or field.one_to_many:
+                field = field.related_model._meta.pk
+            else:
+                field = field.target_field
+            lookup = '%s__%s' % (lookup,
+                                 'pk' if field.primary_key else field.name)
+        if isinstance(field, (models.CharField, models.TextField)):
+            if field.db_index or field.unique or (
+                    field.max_length and
+                    field.max_length <= self.short_field_length):
+                return '%s__istartswith' % lookup, value
+            return '%s__icontains' % lookup, value
+        try:
+            return '%s__exact' % lookup, field.to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            return None
+
+    def get_term_filter(self, fields, term):
+        sfilter = None
+        for field in fields:
+            if term.field and not field_matches(field, term.field):
+                continue
+            lookup = self.get_lookup(field, term.value)
+            if lookup is None:
+                continue
+            condition = get_lookup_filter(self.model, *lookup)
+            sfilter = condition if sfilter is None else sfilter | condition
+        return sfilter
+
+    def get_filter(self, fields, terms):
+        sfilter = None
+        for term in terms:
+            condition = self.get_term_filter(fields, term)
+            if condition is None:
+                # the term can not be found in any field
+                return Q(pk__in=[])
+            sfilter = condition if sfilter is None else sfilter & condition
+        return sfilter
+
+    def search(self, queryset, fields, terms):
+        """
+        Filters queryset by terms (a list of :class:`SearchTerm`) looked up
+        in fields (search_fields not used by related_fields).
+        """
+        sfilter = self.get_filter(fields, terms)
+        if sfilter is not None:
+            queryset = queryset.filter(sfilter)
+        return queryset
+
+
+class IndexSearchBackend(ORMSearchBackend):
+    """
+    Base for full text backends, local text fields are searched in an index
+    and the matching primary keys are used as a subquery, so filters and
+    pagination still compose. Fields across relations are searched with
+    the ORM.
+    """
+    vendor = None
+
+    def __init__(self, model, search_fields):
+        super(IndexSearchBackend, self).__init__(model, search_fields)
+        self.index_fields = []
+        self.orm_fields = []
+        for lookup in self.search_fields:
+            field_name = self.get_index_field(lookup)
+            if field_name:
+                if field_name not in self.index_fields:
+                    self.index_fields.append(field_name)
+            else:
+                self.orm_fields.append(lookup)
+        # one index for each set of fields, CRUDViews of the same model
+        # searching different fields do not share it
+        self.index_name = 'cruds_fts_%s_%s' % (
+            model._meta.db_table[:40], hashlib.md5(
+                ','.join(self.index_fields).encode('utf-8')).hexdigest()[:8])
+        register(self)
+
+    def get_index_field(self, lookup):
+        parts = lookup.split('__')
+        try:
+            field = self.model._meta.get_field(parts[0])
+        except FieldDoesNotExist:
+            return None
+        if len(parts) > 2 or field.is_relation or not field.concrete:
+            return None
+        if len(parts) == 2 and parts[1] in (
+                field.get_lookups() if hasattr(field, 'get_lookups') else ()):
+            return field.name
+        if len(parts) == 1:
+            return field.name
+        return None
+
+    def get_connection(self):
+        return connections[router.db_for_read(self.model)]
+
+    def check_connection(self, connection):
+        if connection.vendor != self.vendor:
+            raise ImproperlyConfigured(
+                "%s needs a %s database, %s uses %s" % (
+                    self.__class__.__name__, self.vendor,
+                    self.model._meta.label, connection.vendor))
+
+    def get_match_subquery(self, terms):
+        raise NotImplementedError
+
+    def is_ready(self, connection):
+        """
+        False while the index can not answer searches, they are made with
+        the ORM then.
+        """
+        return True
+
+    def get_filter(self, fields, terms):
+        """
+        Plain terms are looked up in the index, ``field:value`` terms and
+        fields across relations with the ORM.
+        """
+        if self.index_fields and not self.is_ready(self.get_connection()):
+            return super(IndexSearchBackend, self).get_filter(fields, terms)
+        use_index = self.index_fields and any(
+            lookup not in self.orm_fields for lookup in fields)
+        orm_fields = [lookup for lookup in fields
+                      if lookup in self.orm_fields or not use_index]
+        plain = [term for term in terms if not term.field and use_index]
+        others = [term for term in terms if term not in plain]
+
+        sfilter = super(IndexSearchBackend, self).get_filter(fields, others)
+        if not plain:
+            return sfilter
+        if orm_fields:
+            # every term may match the index or one of the orm fields
+            for term in plain:
+                condition = Q(pk__in=self.get_match_subquery([term.value]))
+                orm_filter = super(IndexSearchBackend, self).get_term_filter(
+                    orm_fields, term)
+                if orm_filter is not None:
+                    condition |= orm_filter
+                sfilter = condition if sfilter is None else sfilter & condition
+        else:
+            # the index ANDs the terms itself, one subquery is enough
+            condition = Q(pk__in=self.get_match_subquery(
+                [term.value for term in plain]))
+            sfilter = condition if sfilter is None else sfilter & condition
+        return sfilter
+
+    def create_index(self, connection=None):
+        raise NotImplementedError
+
+    def drop_index(self, connection=None):
+        raise NotImplementedError
+
+    def update_index(self, connection=None, queryset=None):
+        """
+        Fills the index with every row of queryset (all by default).
+        """
+
+    def rebuild_index(self):
+        connection = self.get_connection()
+        self.drop_index(connection)
+        self.create_index(connection)
+        self.update_index(connection)
+
+
+class SQLiteFTS5SearchBackend(IndexSearchBackend):
+    """
+    Full text search in a side FTS5 virtual table, kept in sync with
+    ``post_save`` and ``post_delete`` signals.
+
+    The table is created and filled running::
+
+        python manage.py cruds_search_index
+
+    until then, or while it is empty, searches use the ORM.
+    """
+    vendor = 'sqlite'
+
+    def __init__(self, model, search_fields):
+        super(SQLiteFTS5SearchBackend, self).__init__(model, search_fields)
+        dispatch_uid = 'cruds_adminlte_%s' % self.index_name
+        post_save.connect(self.handle_save, sender=model,
+                          dispatch_uid=dispatch_uid, weak=False)
+        post_delete.connect(self.handle_delete, sender=model,
+                            dispatch_uid=dispatch_uid, weak=False)
+        # aliases of the databases with a filled index, only for searches:
+        # the signals go to the first backend of the index
+        self.ready = set()
+
+    def quote(self, connection, name):
+        return connection.ops.quote_name(name)
+
+    def create_index(self, connection=None):
+        connection = connection or self.get_connection()
+        self.check_connection(connection)
+        columns = ', '.join(['object_id UNINDEXED'] + [
+            self.quote(connection, field) for field in self.index_fields])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(%s)" % (
+                    self.quote(connection, self.index_name), columns))
+
+    def drop_index(self, connection=None):
+        connection = connection or self.get_connection()
+        self.ready.discard(connection.alias)
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS %s" % (
+                self.quote(connection, self.index_name),))
+
+    def index_exists(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND "
+                "name = %s", [self.index_name])
+            return cursor.fetchone() is not None
+
+    def is_ready(self, connection):
+        """
+        True once the index exists and has rows, checked until then.
+        """
+        self.check_connection(connection)
+        if connection.alias not in self.ready and \
+                self.index_exists(connection):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM %s LIMIT 1" % (
+                    self.quote(connection, self.index_name),))
+                if cursor.fetchone() is not None:
+                    self.ready.add(connection.alias)
+        return connection.alias in self.ready
+
+    def get_object_id(self, connection, pk):
+        return self.model._meta.pk.get_db_prep_value(pk, connection)
+
+    def get_row(self, connection, obj):
+        return [self.get_object_id(connection, obj.pk)] + [
+            six.text_type(getattr(obj, field) or '')
+            for field in self.index_fields]
+
+    def delete_rows(self, connection, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "DELETE FROM %s WHERE object_id = %%s" % (
+                    self.quote(connection, self.index_name),),
+                [[self.get_object_id(connection, pk)] for pk in pks])
+
+    def insert_rows(self, connection, objs):
+        placeholders = ', '.join(['%s'] * (len(self.index_fields) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO %s VALUES (%s)" % (
+                    self.quote(connection, self.index_name), placeholders),
+                [self.get_row(connection, obj) for obj in objs])
+
+    def update_index(self, connection=None, queryset=None):
+        connection = connection or self.get_connection()
+        self.create_index(connection)
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        queryset = queryset.only('pk', *self.index_fields).order_by()
+        batch = []
+        for obj in queryset.iterator():
+            batch.append(obj)
+            if len(batch) >= 1000:
+                self.delete_rows(connection, [item.pk for item in batch])
+                self.insert_rows(connection, batch)
+                batch = []
+        if batch:
+            self.delete_rows(connection, [item.pk for item in batch])
+            self.insert_rows(connection, batch)
+
+    def handle_save(self, sender, instance, raw=False, using=None, **kwargs):
+        if raw:
+            return
+        connection = connections[using or router.db_for_write(sender)]
+        # rows saved before the index is built are added by the command
+        if connection.vendor != self.vendor or \
+                not self.index_exists(connection):
+            return
+        self.delete_rows(connection, [instance.pk])
+        self.insert_rows(connection, [instance])
+
+    def handle_delete(self, sender, instance, using=None, **kwargs):
+        connection = connections[using or router.db_for_write(sender)]
+        if connection.vendor != self.vendor or \
+                not self.index_exists(connection):
+            return
+        self.delete_rows(connection, [instance.pk])
+
+    def get_match_query(self, terms):
+        # every term is a quoted prefix query, terms are ANDed
+        return ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+
+    def get_match_subquery(self, terms):
+        connection = self.get_connection()
+        self.check_connection(connection)
+        table = self.quote(connection, self.index_name)
+        return RawSubquery(
+            "SELECT object_id FROM %s WHERE %s MATCH %%s" % (table, table),
+            [self.get_match_query(terms)])
+
+
+class PostgresSearchBackend(IndexSearchBackend):
+    """
+    Full text search with ``to_tsvector`` served by a GIN expression index,
+    create it running::
+
+        python manage.py cruds_search_index
+    """
+    vendor = 'postgresql'
+    config = 'simple'
+
+    def get_document(self, connection):
+        qn = connection.ops.quote_name
+        columns = " || ' ' || ".join(
+            "COALESCE(%s::text, '')" % qn(
+                self.model._meta.get_field(field).column)
+            for field in self.index_fields)
+        return "to_tsvector('%s'::regconfig, %s)" % (self.config, columns)
+
+    def create_index(self, connection=None):
+        connection = connection or self.get_connection()
+        self.check_connection(connection)
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS %s ON %s USING GIN ((%s))" % (
+                    qn(self.index_name), qn(self.model._meta.db_table),
+                    self.get_document(connection)))
+
+    def drop_index(self, connection=None):
+        connection = connection or self.get_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX IF EXISTS %s" % (
+                connection.ops.quote_name(self.index_name),))
+
+    def get_match_subquery(self, terms):
+        connection = self.get_connection()
+        self.check_connection(connection)
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        return RawSubquery(
+            "SELECT %s FROM %s WHERE %s @@ plainto_tsquery('%s'::regconfig, "
+            "%%s)" % (qn(opts.pk.column), qn(opts.db_table),
+                      self.get_document(connection), self.config),
+            [' '.join(terms)])
+
+
+SEARCH_BACKENDS = {
+    'orm': ORMSearchBackend,
+    'sqlite_fts5': SQLiteFTS5SearchBackend,
+    'postgres': PostgresSearchBackend,
+}
+
+_registry = {}
+
+
+def register(backend):
+    """
+    Keeps index backends so management commands can find them.
+    """
+    _registry[backend.index_name] = backend
+
+
+def get_registered_backends():
+    return list(_registry.values())
+
+
+def get_search_backend(backend, model, search_fields):
+    """
+    Returns a search backend instance, backend is a name in SEARCH_BACKENDS,
+    a dotted path or a class.
+    """
+    if isinstance(backend, six.string_types):
+        if backend in SEARCH_BACKENDS:
+            backend = SEARCH_BACKENDS[backend]
+        else:
+            backend = import_string(backend)
+    return backend(model, search_fields)
@@ -1,4 +1,8 @@
 $(function(){
+	// the form plugins are only loaded by pages with forms
+	if (!$.fn.select2) {
+		return;
+	}
 	$('select').select2();
 	$('input').iCheck({
 		checkboxClass: 'icheckbox_minimal-blue',
@@ -40,3 +44,16 @@ jQuery(document).ready(function(){
         })
     })
 })
+
+$(function(){
+	// deferred counts of the list pagination (top and bottom), one request
+	var counters = $('.cruds-count[data-count-url]');
+	if (!counters.length) {
+		return;
+	}
+	$.getJSON(counters.first().data('count-url'), function (data) {
+		counters.each(function () {
+			$(this).text(data.count_display + ' ' + $(this).data('count-label'));
+		});
+	});
+});
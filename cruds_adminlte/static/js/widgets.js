@@ -0,0 +1,105 @@
+/*
+ * Initializers of the cruds_adminlte widgets. Widgets only mark their
+ * elements with data-cruds-widget="<type>", this file is included once per
+ * page by form.media and starts every marked element, also the ones
+ * inserted later by ajax forms.
+ */
+(function ($) {
+    if (window.crudsWidgets) {
+        window.crudsWidgets.init(document);
+        return;
+    }
+
+    function Uint8ToString(u8a) {
+        var CHUNK_SZ = 0x8000;
+        var c = [];
+        for (var i = 0; i < u8a.length; i += CHUNK_SZ) {
+            c.push(String.fromCharCode.apply(null, u8a.subarray(i, i + CHUNK_SZ)));
+        }
+        return c.join("");
+    }
+
+    function readImages(widget, files) {
+        var hiddenControl = widget.find('input[type=hidden]');
+        var control = widget.find('input[type=file]');
+        var controlThumb = widget.find('img');
+        $.each(files, function (i, blob) {
+            blob.stream().getReader().read().then(function (value) {
+                var imgData = 'data:' + blob.type + ';base64,' +
+                    btoa(Uint8ToString(value.value));
+                hiddenControl.attr('value', imgData);
+                control.attr('value', imgData);
+                controlThumb.attr('src', imgData);
+            });
+        });
+    }
+
+    var CKEDITOR_TOOLBAR = [
+        ['Format', 'Font', 'FontSize', 'Bold', 'Italic', 'Underline', 'StrikeThrough', '-',
+         'Undo', 'Redo', '-', 'Cut', 'Copy', 'Paste', 'Find', 'Replace', '-',
+         'Outdent', 'Indent', '-', 'Print', '-', 'NumberedList', 'BulletedList', '-',
+         'JustifyLeft', 'JustifyCenter', 'JustifyRight', 'JustifyBlock', '-',
+         'Image', 'Table', '-', 'Link', 'Smiley'], ['Source']
+    ];
+
+    var initializers = {
+        datepicker: function (el) {
+            el.datepicker({autoclose: true});
+        },
+        datetimepicker: function (el) {
+            el.datetimepicker();
+        },
+        timepicker: function (el) {
+            el.timepicker({showInputs: false});
+        },
+        colorpicker: function (el) {
+            el.colorpicker();
+        },
+        ckeditor: function (el) {
+            CKEDITOR.config.toolbar = CKEDITOR_TOOLBAR;
+            var options = {language: el.data('lang') || 'en'};
+            if (el.data('custom-config')) {
+                options.customConfig = el.data('custom-config');
+            }
+            CKEDITOR.replace(el.attr('id'), options);
+        }
+    };
+
+    function init(root) {
+        $(root).find('[data-cruds-widget]').each(function () {
+            var el = $(this);
+            var initializer = initializers[el.data('cruds-widget')];
+            if (!initializer || el.data('cruds-widget-ready')) {
+                return;
+            }
+            el.data('cruds-widget-ready', true);
+            initializer(el);
+        });
+    }
+
+    // image widgets only react to events, one handler for all of them
+    $(document).on('change', '[data-cruds-widget=image] input[type=file]', function () {
+        readImages($(this).closest('[data-cruds-widget=image]'), this.files);
+    });
+    $(document).on('dragover', '[data-cruds-widget=image] input[type=file]', function (event) {
+        event.preventDefault();
+    });
+    $(document).on('drop', '[data-cruds-widget=image] input[type=file]', function (event) {
+        event.preventDefault();
+        readImages($(this).closest('[data-cruds-widget=image]'),
+                   event.originalEvent.dataTransfer.files);
+    });
+
+    window.crudsWidgets = {
+        init: init,
+        register: function (name, initializer) {
+            initializers[name] = initializer;
+        }
+    };
+    $(function () {
+        init(document);
+    });
+    $(document).ajaxComplete(function () {
+        init(document);
+    });
+})(jQuery);
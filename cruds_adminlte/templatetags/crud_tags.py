@@ -1,15 +1,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-import os.path
-
-from cruds_adminlte import utils
+from cruds_adminlte import bundles, columns, formatters, utils
+from cruds_adminlte.pagination import get_page_window
 from django import template
 
 from django.urls import (reverse, NoReverseMatch)  # django2.0
 from django.db import models
 from django.utils import six
-from django.utils.html import escape
 from django.utils.safestring import mark_safe
 
 
@@ -36,17 +34,42 @@ def get_attr(obj, attr):
 
 @register_tag
 def crud_url(obj, action, namespace=None):
-    try:
-        nurl = utils.crud_url_name(type(obj), action)
-        if namespace:
-            nurl = namespace + ':' + nurl
-        if action in utils.LIST_ACTIONS:
-            url = reverse(nurl)
-        else:
-            url = reverse(nurl, kwargs={'pk': obj.pk})
-    except NoReverseMatch:
-        url = None
-    return url
+    nurl = utils.crud_url_name(type(obj), action)
+    if namespace:
+        nurl = namespace + ':' + nurl
+    if action in utils.LIST_ACTIONS:
+        return utils.reverse_url(nurl)
+    return utils.reverse_instance_url(nurl, obj.pk)
+
+
+@register.simple_tag(takes_context=True)
+def crud_row_url(context, obj, action):
+    """
+    Assigns the url of action for a row of a list, filled in from the
+    ``url_templates`` of the view instead of reversing it for every row::
+
+        {% crud_row_url object "update" as url %}
+    """
+    templates = context.get('url_templates') or {}
+    url_template = templates.get(action)
+    if url_template is not None:
+        return url_template.format(obj.pk)
+    base_model = context.get('base_model')
+    if isinstance(base_model, models.Model):
+        return crud_inline_url(base_model, obj, action,
+                               context.get('namespace'))
+    return crud_url(obj, action, context.get('namespace'))
+
+
+@register_tag
+def page_window(page, on_each_side=3, on_ends=1):
+    """
+    Assigns the page numbers to link for ``page``, ``None`` marks elided
+    pages::
+
+        {% page_window page_obj as pages %}
+    """
+    return get_page_window(page, on_each_side, on_ends)
 
 
 @register_tag
@@ -72,35 +95,12 @@ def format_value(obj, field_name):
     Simple value formatting.
 
     If value is model instance returns link to detail view if exists.
+    Formatters are built once per model and field, see
+    ``cruds_adminlte.formatters``.
     """
-    if '__' in field_name:
-        related_model, field_name = field_name.split('__', 1)
-        obj = getattr(obj, related_model)
-    display_func = getattr(obj, 'get_%s_display' % field_name, None)
-    if display_func:
-        return display_func()
-    value = getattr(obj, field_name)
-
-    if isinstance(value, models.fields.files.FieldFile):
-        if value:
-            return mark_safe('<a href="%s">%s</a>' % (
-                value.url,
-                os.path.basename(value.name),
-            ))
-        else:
-            return ''
-
-    if isinstance(value, models.Model):
-        url = crud_url(value, utils.ACTION_UPDATE)
-        if url:
-            return mark_safe('<a href="%s">%s</a>' % (url, escape(value)))
-        else:
-            if hasattr(value, 'get_absolute_url'):
-                url = getattr(value, 'get_absolute_url')()
-                return mark_safe('<a href="%s">%s</a>' % (url, escape(value)))
-    if value is None:
-        value = ""
-    return value
+    if not isinstance(obj, models.Model):
+        return formatters.format_attribute(obj, field_name)
+    return formatters.get_formatter(type(obj), field_name)(obj)
 
 
 @register.inclusion_tag('cruds/templatetags/crud_fields.html')
@@ -126,9 +126,13 @@ def crud_fields(obj, fields=None):
         field_names = [f.strip() for f in fields.split(',')]
         fields = utils.get_fields(type(obj), include=field_names)
 
+    model = type(obj)
     return {
         'object': obj,
         'fields': fields,
+        'rows': [(field, field_name,
+                  formatters.get_formatter(model, field)(obj))
+                 for field, field_name in fields.items()],
     }
 
 
@@ -142,3 +146,81 @@ def get_fields(model, fields=None):
         model,
         include
     )
+
+
+class RowCacheNode(template.Node):
+
+    def __init__(self, nodelist, obj):
+        self.nodelist = nodelist
+        self.obj = obj
+
+    def render(self, context):
+        row_cache = context.get('row_cache')
+        if row_cache is None:
+            return self.nodelist.render(context)
+        obj = self.obj.resolve(context)
+        html = row_cache.get(obj)
+        if html is None:
+            html = self.nodelist.render(context)
+            row_cache.set(obj, html)
+        return mark_safe(html)
+
+
+@register.tag
+def crud_row_cache(parser, token):
+    """
+    Caches the rendered row of obj when the list view has
+    ``row_cache_timeout``::
+
+        {% crud_row_cache object %}<tr>...</tr>{% endcrud_row_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            "'%s' tag takes one argument" % bits[0])
+    nodelist = parser.parse(('endcrud_row_cache',))
+    parser.delete_first_token()
+    return RowCacheNode(nodelist, parser.compile_filter(bits[1]))
+
+
+@register.simple_tag(takes_context=True)
+def render_column(context, obj, field, field_type):
+    """
+    Renders the cell of field in a list table, the renderer of every field
+    type is looked up once per template render::
+
+        {% render_column object field field_name.1 %}
+    """
+    renderers = context.render_context.get('cruds_column_renderers')
+    if renderers is None:
+        renderers = context.render_context['cruds_column_renderers'] = {}
+    renderer = renderers.get(field_type)
+    if renderer is None:
+        renderer = renderers[field_type] = columns.get_column_renderer(
+            field_type, context.template.engine)
+    return renderer(obj, field, context)
+
+
+@register.simple_tag(takes_context=True)
+def crud_bundles(context, *args):
+    """
+    Links the static bundles named in args and the ones needed by the media
+    of the forms (or lists of forms) in args, the files of the media that
+    are not bundled are linked too::
+
+        {% crud_bundles 'adminlte' %}
+        {% crud_bundles 'core' form filters %}
+
+    Bundles and files are only linked once per page, including the
+    templates it includes. Ajax fragments, inserted in a page that already
+    has the bundles, link ``{{ form.media }}`` instead.
+    """
+    names = [arg for arg in args if isinstance(arg, six.string_types)]
+    objects = [arg for arg in args if not isinstance(arg, six.string_types)]
+    # included templates push their own render_context dict, the first one
+    # lasts for the whole page
+    root = context.render_context.dicts[0]
+    if 'cruds_bundles_emitted' not in root:
+        root['cruds_bundles_emitted'] = set()
+    return mark_safe(bundles.render_bundles(
+        names, objects, root['cruds_bundles_emitted']))
@@ -3,11 +3,22 @@ from __future__ import unicode_literals
 
 from collections import OrderedDict
 
-from django.urls import reverse  # django 2.0
+import six
+from six.moves.urllib.parse import quote
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.db import models
+from django.db.models.query_utils import Q
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import (reverse, NoReverseMatch, get_script_prefix,
+                         get_urlconf)  # django 2.0
+from django.utils.encoding import force_text
+from django.utils.http import RFC3986_SUBDELIMS
 
 ACTION_CREATE = 'create'
 ACTION_DELETE = 'delete'
 ACTION_DETAIL = 'detail'
+ACTION_EXPORT = 'export'
 ACTION_LIST = 'list'
 ACTION_UPDATE = 'update'
 
@@ -19,10 +30,14 @@ INSTANCE_ACTIONS = (
 LIST_ACTIONS = (
     ACTION_CREATE,
     ACTION_LIST,
+    ACTION_EXPORT,
 )
 
 ALL_ACTIONS = LIST_ACTIONS + INSTANCE_ACTIONS
 
+# matches the usual pk patterns ([^/]+, \d+), replaced by the real pk
+PK_PLACEHOLDER = '999999999999999'
+
 
 def crud_url_name(model, action, prefix=None):
     """
@@ -77,6 +92,236 @@ def get_fields(model, include=None):
     return fields
 
 
+def get_related_lookups(model, include=None):
+    """
+    Returns a ``(select_related, prefetch_related)`` tuple with the lookups
+    needed to render ``include`` fields (or every editable field) without
+    hitting the database once per row.
+
+    Single-valued relations (foreign keys and one to one fields) are joined
+    with ``select_related``, multi-valued ones (many to many fields and
+    reverse foreign keys) are fetched with ``prefetch_related``.
+    """
+    if include:
+        names = include
+    else:
+        names = [field.name for field in model._meta.fields if field.editable]
+
+    select_related = []
+    prefetch_related = []
+    for name in names:
+        opts = model._meta
+        path = []
+        many = False
+        for part in name.split('__'):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not field.is_relation:
+                break
+            path.append(part)
+            if field.many_to_many or field.one_to_many or \
+                    field.related_model is None:
+                many = True
+                break
+            opts = field.related_model._meta
+        if not path:
+            continue
+        lookup = '__'.join(path)
+        if many:
+            if lookup not in prefetch_related:
+                prefetch_related.append(lookup)
+        elif lookup not in select_related:
+            select_related.append(lookup)
+    return select_related, prefetch_related
+
+
+def get_only_fields(model, include=None, ordering=None):
+    """
+    Returns the lookups to pass to ``QuerySet.only()`` so just the columns
+    needed to render ``include`` fields (or every editable field) are
+    loaded: primary key, rendered fields, ordering fields and the foreign
+    keys joined by :func:`get_related_lookups`.
+
+    Related objects rendered as a whole keep all their columns, they are
+    displayed with ``str()``.
+    """
+    if include:
+        names = include
+    else:
+        names = [field.name for field in model._meta.fields if field.editable]
+
+    lookups = [model._meta.pk.name]
+    for name in ordering or []:
+        if isinstance(name, six.string_types) and name != '?':
+            name = name.lstrip('-+').split('__')[0]
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many and \
+                    name not in lookups:
+                lookups.append(name)
+
+    whole = []
+    for name in names:
+        opts = model._meta
+        path = []
+        for part in name.split('__'):
+            if part == 'pk':
+                part = opts.pk.name
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not field.concrete or field.many_to_many:
+                break
+            path.append(part)
+            if not field.is_relation:
+                break
+            opts = field.related_model._meta
+        else:
+            if path:
+                whole.append('__'.join(path))
+        if path:
+            lookup = '__'.join(path)
+            if lookup not in lookups:
+                lookups.append(lookup)
+    return [lookup for lookup in lookups
+            if not any(lookup.startswith(prefix + '__') for prefix in whole)]
+
+
+def get_indexed_fields(model):
+    """
+    Returns the names of the fields that lead a database index: primary
+    key, unique and ``db_index`` fields (foreign keys have one by default)
+    and the first field of ``Meta.indexes``, ``index_together`` and
+    ``unique_together``.
+    """
+    opts = model._meta
+    names = [field.name for field in opts.concrete_fields
+             if field.primary_key or field.unique or field.db_index]
+    leading = [index.fields[0].lstrip('-') for index in opts.indexes
+               if index.fields]
+    leading += [fields[0] for fields in opts.index_together if fields]
+    leading += [fields[0] for fields in opts.unique_together if fields]
+    for name in leading:
+        if name not in names:
+            names.append(name)
+    return names
+
+
+class Echo(object):
+    """
+    File-like object returning what is written, lets ``csv.writer`` build
+    the lines of a streamed response.
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_export_fields(model, include=None):
+    """
+    Returns the lookups of ``include`` fields (or every editable field) that
+    can be read with ``values_list()`` without repeating rows: local fields,
+    foreign keys (their primary key) and fields across foreign keys.
+    """
+    if include:
+        names = include
+    else:
+        names = [field.name for field in model._meta.fields if field.editable]
+
+    lookups = []
+    for name in names:
+        opts = model._meta
+        path = []
+        for part in name.split('__'):
+            if part == 'pk':
+                part = opts.pk.name
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if not field.concrete or field.many_to_many:
+                break
+            path.append(part)
+            if not field.is_relation:
+                lookups.append('__'.join(path))
+                break
+            opts = field.related_model._meta
+        else:
+            lookups.append('__'.join(path))
+    return lookups
+
+
+def get_pk_value(value):
+    """
+    Returns value with model instances (alone or in a list) replaced by
+    their primary keys.
+    """
+    if isinstance(value, models.Model):
+        return value.pk
+    if isinstance(value, (list, tuple, set)):
+        return [get_pk_value(item) for item in value]
+    return value
+
+
+def get_lookup_filter(model, lookup, value):
+    """
+    Returns a ``Q`` filtering model by ``lookup=value``.
+
+    Lookups crossing a multi-valued relation (many to many fields, reverse
+    foreign keys) are compiled to ``pk__in=<subquery on the related
+    model>``, a semi-join that does not repeat rows so ``distinct()`` is
+    not needed. Lookups matching NULL (``isnull=True``, None) also match
+    the rows without related rows, with an anti-join. Single-valued
+    relations keep plain joins.
+    """
+    opts = model._meta
+    parts = lookup.split('__')
+    for index, part in enumerate(parts):
+        if part == 'pk':
+            break
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation or field.related_model is None:
+            break
+        if field.many_to_many or field.one_to_many:
+            related = field.related_model
+            rest = parts[index + 1:]
+            if not rest:
+                rest = ['pk']
+            elif rest[0] != 'pk':
+                try:
+                    related._meta.get_field(rest[0])
+                except FieldDoesNotExist:
+                    rest = ['pk'] + rest
+            if rest[0] == 'pk':
+                value = get_pk_value(value)
+            try:
+                subquery = related._base_manager.filter(
+                    **{'__'.join(rest): value}).values(
+                        field.remote_field.name)
+            except FieldError:
+                # hidden or generic relations, join them
+                break
+            in_lookup = '__'.join(parts[:index] + ['pk', 'in'])
+            condition = Q(**{in_lookup: subquery})
+            if value is None or (rest[-1] == 'isnull' and value):
+                # like the join, rows without related rows match NULL
+                related_pks = related._base_manager.filter(
+                    **{'%s__isnull' % field.remote_field.name: False}).values(
+                        field.remote_field.name)
+                condition |= ~Q(**{in_lookup: related_pks})
+            return condition
+        opts = field.related_model._meta
+    return Q(**{lookup: value})
+
+
 def crud_url(instance, action, prefix=None, namespace=None,
              additional_kwargs=None):
     """
@@ -99,6 +344,124 @@ def crud_url(instance, action, prefix=None, namespace=None,
     return reverse(url, kwargs=additional_kwargs)
 
 
+class UrlTemplate(object):
+    """
+    Url reversed once with :data:`PK_PLACEHOLDER` as pk, :meth:`format`
+    returns the url of an object without going through the resolver.
+    """
+
+    def __init__(self, url):
+        self.url = url
+
+    def format(self, pk):
+        return self.url.replace(PK_PLACEHOLDER, quote(
+            force_text(pk), safe=RFC3986_SUBDELIMS + '~:@'))
+
+
+# (urlconf, script prefix, url name, kind) -> url, UrlTemplate or None
+_url_cache = {}
+
+
+@receiver(setting_changed)
+def clear_url_cache(setting=None, **kwargs):
+    if setting is None or setting in ('ROOT_URLCONF', 'FORCE_SCRIPT_NAME'):
+        _url_cache.clear()
+
+
+def reverse_url(name):
+    """
+    Reverses url name without arguments, None when it does not exist.
+    Results (misses too) are kept for the process, by urlconf and script
+    prefix.
+    """
+    key = (get_urlconf(), get_script_prefix(), name, 'url')
+    try:
+        return _url_cache[key]
+    except KeyError:
+        pass
+    try:
+        url = reverse(name)
+    except NoReverseMatch:
+        url = None
+    _url_cache[key] = url
+    return url
+
+
+def get_url_template(name, **kwargs):
+    """
+    Returns the UrlTemplate of url name, None when it can not be reversed
+    with the placeholder pk. Only templates without other arguments are kept
+    like :func:`reverse_url` results.
+    """
+    key = (get_urlconf(), get_script_prefix(), name, 'template')
+    cacheable = not kwargs
+    if cacheable and key in _url_cache:
+        return _url_cache[key]
+    kwargs['pk'] = PK_PLACEHOLDER
+    try:
+        url = reverse(name, kwargs=kwargs)
+    except NoReverseMatch:
+        url = None
+    if url is not None and url.count(PK_PLACEHOLDER) == 1:
+        url_template = UrlTemplate(url)
+    else:
+        url_template = None
+    if cacheable:
+        _url_cache[key] = url_template
+    return url_template
+
+
+def reverse_instance_url(name, pk, **kwargs):
+    """
+    Returns the url name of the object with pk, from its UrlTemplate or
+    reversed when there is none (a slug or uuid converter does not match
+    the placeholder). None when it does not exist.
+    """
+    url_template = get_url_template(name, **kwargs)
+    if url_template is not None:
+        return url_template.format(pk)
+    kwargs['pk'] = pk
+    try:
+        return reverse(name, kwargs=kwargs)
+    except NoReverseMatch:
+        return None
+
+
+def get_url_templates(model, actions=INSTANCE_ACTIONS, namespace=None,
+                      **kwargs):
+    """
+    Returns a dict with the UrlTemplate (or None) of every action, kwargs
+    are the other url arguments (``model_id`` for inlines).
+    """
+    templates = {}
+    for action in actions:
+        name = crud_url_name(model, action)
+        if namespace:
+            name = namespace + ':' + name
+        templates[action] = get_url_template(name, **kwargs)
+    return templates
+
+
+def get_action_urls(model, namespace=None, pk=None):
+    """
+    Returns a dict with the ``url_<action>`` of every list action and, when
+    pk is given, of every instance action, None for missing urls.
+    """
+    urls = {}
+    if pk is not None:
+        for action in INSTANCE_ACTIONS:
+            name = crud_url_name(model, action)
+            if namespace:
+                name = namespace + ':' + name
+            urls['url_%s' % action] = reverse_instance_url(name, pk)
+    for action in LIST_ACTIONS:
+        name = crud_url_name(model, action)
+        if namespace:
+            name = namespace + ':' + name
+        urls['url_%s' % action] = reverse_url(name)
+    return urls
+
+
 def get_related_class_field(obj, field):
     objfield = obj._meta.get_field(field)
     rf = objfield.remote_field.model
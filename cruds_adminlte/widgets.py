@@ -1,13 +1,30 @@
 from django.forms.utils import flatatt
 from django.forms.widgets import Widget, Textarea
-from django.template import loader
-from django.utils.safestring import mark_safe
 from django.conf import settings
 
-class ImageWidget(Widget):
+# delegated initializers of every widget type, included once per page by
+# form.media however many widgets the form has
+WIDGETS_JS = 'js/widgets.js'
+
+
+class RendererMixin(object):
+    """
+    Renders the widget template with the form renderer, templates are
+    compiled once instead of looked up for every field.
+    """
+
+    def render(self, name, value, attrs=None, renderer=None):
+        context = self.get_context(name, value, attrs)
+        return self._render(self.template_name, context, renderer)
+
+
+class ImageWidget(RendererMixin, Widget):
 
     template_name = 'widgets/image.html'
 
+    class Media:
+        js = (WIDGETS_JS,)
+
     def get_context(self, name, value, attrs=None):
         context = dict(self.attrs.items())
         if attrs is not None:
@@ -17,15 +34,16 @@ class ImageWidget(Widget):
             context['value'] = value
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
-
 
-class DatePickerWidget(Widget):
+class DatePickerWidget(RendererMixin, Widget):
 
     template_name = 'widgets/datepicker.html'
 
+    class Media:
+        # bootstrap-datepicker is in the forms bundle, cruds.js
+        # uses it for every date input
+        js = (WIDGETS_JS,)
+
     def get_context(self, name, value, attrs=None):
         context = dict(self.attrs.items())
         if attrs is not None:
@@ -38,15 +56,15 @@ class DatePickerWidget(Widget):
         context['djformat'] = settings.DATE_FORMAT
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
 
-
-class TimePickerWidget(Widget):
+class TimePickerWidget(RendererMixin, Widget):
 
     template_name = 'widgets/timepicker.html'
 
+    class Media:
+        css = {'all': ('timepicker/bootstrap-timepicker.min.css',)}
+        js = ('timepicker/bootstrap-timepicker.min.js', WIDGETS_JS)
+
     def get_context(self, name, value, attrs=None):
         context = dict(self.attrs.items())
         if attrs is not None:
@@ -59,15 +77,15 @@ class TimePickerWidget(Widget):
         context['djformat'] = settings.TIME_FORMAT
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
 
-
-class DateTimePickerWidget(Widget):
+class DateTimePickerWidget(RendererMixin, Widget):
 
     template_name = 'widgets/datetimepicker.html'
 
+    class Media:
+        # bootstrap-datetimepicker is in the forms bundle
+        js = (WIDGETS_JS,)
+
     def get_context(self, name, value, attrs=None):
         context = dict(self.attrs.items())
         if attrs is not None:
@@ -82,15 +100,15 @@ class DateTimePickerWidget(Widget):
 
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
-
 
-class ColorPickerWidget(Widget):
+class ColorPickerWidget(RendererMixin, Widget):
 
     template_name = 'widgets/colorpicker.html'
 
+    class Media:
+        css = {'all': ('colorpicker/bootstrap-colorpicker.min.css',)}
+        js = ('colorpicker/bootstrap-colorpicker.min.js', WIDGETS_JS)
+
     def get_context(self, name, value, attrs=None):
         context = dict(self.attrs.items())
         if attrs is not None:
@@ -100,15 +118,14 @@ class ColorPickerWidget(Widget):
             context['value'] = value
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
-
 
-class CKEditorWidget(Textarea):
+class CKEditorWidget(RendererMixin, Textarea):
 
     template_name = 'widgets/ckeditor.html'
 
+    class Media:
+        js = ('ckeditor/ckeditor.js', WIDGETS_JS)
+
     def get_context(self, name, value, attrs=None):
         self.attrs['flatatt'] = flatatt(self.attrs)
         context = dict(self.attrs.items())
@@ -119,11 +136,8 @@ class CKEditorWidget(Textarea):
             context['value'] = value
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
 
-class SelectManyWidget(Widget):
+class SelectManyWidget(RendererMixin, Widget):
 
     template_name = 'widgets/selectmany.html'
 
@@ -136,11 +150,8 @@ class SelectManyWidget(Widget):
             context['value'] = value
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
 
-class ListAddOneWidget(Widget):
+class ListAddOneWidget(RendererMixin, Widget):
 
     template_name = 'widgets/listaddone.html'
 
@@ -158,10 +169,6 @@ class ListAddOneWidget(Widget):
 
         return context
 
-    def render(self, name, value, attrs=None, renderer=None):
-        context = self.get_context(name, value, attrs)
-        return mark_safe(loader.render_to_string(self.template_name, context))
-
     def list_model(self, model, ids = []):
         manager = getattr(model, 'objects')
         return manager.filter(**{'%s__in' % model()._meta.pk.name: ids}).all()
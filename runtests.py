@@ -16,10 +16,21 @@ try:
             "django.contrib.auth",
             "django.contrib.contenttypes",
             "django.contrib.sites",
+            "django.contrib.staticfiles",
             "cruds_adminlte",
             "tests.testapp",
         ],
         SITE_ID=1,
+        STATIC_URL='/static/',
+        TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'APP_DIRS': True,
+            'OPTIONS': {
+                'context_processors': [
+                    'django.template.context_processors.request',
+                ],
+            },
+        }],
         NOSE_ARGS=['-s'],
         ROOT_URLCONF='tests.testapp.urls',
     )
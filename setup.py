@@ -31,12 +31,18 @@ setup(
     packages=[
         'cruds_adminlte',
         'cruds_adminlte.templatetags',
+        'cruds_adminlte.management',
+        'cruds_adminlte.management.commands',
     ],
     include_package_data=True,
     install_requires=[
         'django-crispy-forms',
         'djangoajax',
     ],
+    extras_require={
+        'jinja2': ['Jinja2'],
+        'bundles': ['rjsmin', 'rcssmin', 'brotli'],
+    },
     license="BSD",
     zip_safe=False,
     keywords='django-cruds-adminlte',
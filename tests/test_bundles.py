@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import gzip
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest import skipIf
+
+from django import forms
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, override_settings
+from six import StringIO
+
+from cruds_adminlte.bundles import BUNDLES, rewrite_css_urls
+from cruds_adminlte.widgets import CKEditorWidget, ColorPickerWidget
+
+
+class ColorForm(forms.Form):
+    color = forms.CharField(widget=ColorPickerWidget)
+    text = forms.CharField(widget=CKEditorWidget)
+
+
+PAGE = Template(
+    "{% load crud_tags %}{% crud_bundles 'adminlte' %}"
+    "{% crud_bundles 'core' form %}"
+    "{% include form_template %}")
+
+# like cruds/_form.html
+FORM = Template("{% load crud_tags %}{% crud_bundles form %}")
+
+
+class TestBundles(SimpleTestCase):
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def render(self, **context):
+        with override_settings(STATIC_ROOT=self.static_root):
+            context['form_template'] = FORM
+            context = Context(context)
+            html = PAGE.render(context)
+        self.assertNotIn('cruds_bundles_emitted', context)
+        return html
+
+    def test_source_files_without_bundles(self):
+        html = self.render()
+        self.assertIn('/static/jquery/dist/jquery.min.js', html)
+        self.assertIn('/static/js/cruds.js', html)
+        self.assertNotIn('select2', html)
+        self.assertNotIn('colorpicker', html)
+
+        html = self.render(form=ColorForm())
+        self.assertEqual(html.count('select2.min.js'), 1)
+        self.assertEqual(html.count('bootstrap-colorpicker.min.js'), 1)
+        self.assertEqual(html.count('js/widgets.js'), 1)
+        self.assertEqual(html.count('ckeditor/ckeditor.js'), 1)
+
+    def test_build(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            call_command('cruds_build_bundles', stdout=StringIO())
+        root = os.path.join(self.static_root, 'cruds_bundles')
+        names = os.listdir(root)
+        core = [name for name in names
+                if name.startswith('core.') and name.endswith('.js')][0]
+        with open(os.path.join(root, core), 'rb') as bundle:
+            content = bundle.read()
+        with gzip.open(os.path.join(root, core + '.gz')) as compressed:
+            self.assertEqual(compressed.read(), content)
+
+        html = self.render(form=ColorForm())
+        self.assertIn('/static/cruds_bundles/%s' % core, html)
+        self.assertIn('/static/cruds_bundles/colorpicker.', html)
+        self.assertNotIn('/static/js/cruds.js', html)
+        # ckeditor is never bundled
+        self.assertIn('/static/ckeditor/ckeditor.js', html)
+
+    def test_adminlte_pages(self):
+        # their forms are plain html, every widget plugin is linked
+        with override_settings(STATIC_ROOT=self.static_root):
+            html = render_to_string('adminlte/login.html')
+        for path in ('jquery/dist/jquery.min.js', 'js/cruds.js',
+                     'select2.min.js', 'bootstrap-timepicker.min.js',
+                     'bootstrap-colorpicker.min.css', 'js/widgets.js',
+                     'ckeditor/ckeditor.js'):
+            self.assertEqual(html.count(path), 1, path)
+
+    def test_rewrite_css_urls(self):
+        css = ("a{background:url('../img/a.png')}"
+               "b{background:url(data:image/png;base64,AA)}"
+               "i{src:url(https://example.com/a.woff)}")
+        self.assertEqual(
+            rewrite_css_urls(css, 'admin-lte/dist/css/AdminLTE.css'),
+            "a{background:url('../admin-lte/dist/img/a.png')}"
+            "b{background:url(data:image/png;base64,AA)}"
+            "i{src:url(https://example.com/a.woff)}")
+
+    @skipIf(shutil.which('node') is None, 'node is not installed')
+    def test_javascript_parses(self):
+        # one syntax error stops every script of the bundle
+        with override_settings(STATIC_ROOT=self.static_root):
+            call_command('cruds_build_bundles', stdout=StringIO())
+        root = os.path.join(self.static_root, 'cruds_bundles')
+        paths = [finders.find(path) for bundle in BUNDLES.values()
+                 for path in bundle['js']]
+        paths += [os.path.join(root, name) for name in os.listdir(root)
+                  if name.endswith('.js')]
+        for path in paths:
+            self.assertEqual(subprocess.call(['node', '--check', path]), 0,
+                             '%s has syntax errors' % path)
@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+from unittest import skipIf
+
+from django.contrib.auth.models import AnonymousUser, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.forms import modelform_factory
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cruds_adminlte import columns
+from cruds_adminlte.actions import BulkUpdateAction
+from cruds_adminlte.crud import CRUDView
+
+from tests.testapp.models import (
+    Author,
+    Book,
+)
+
+
+class BookCRUD(CRUDView):
+    model = Book
+    check_login = False
+    check_perms = False
+    list_fields = ['title', 'author']
+    search_fields = ['title__icontains']
+    paginate_by = 2
+
+
+class CRUDViewTestCase(TestCase):
+    crud_class = BookCRUD
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.author = Author.objects.create(name='Foo')
+        for i in range(5):
+            Book.objects.create(author=self.author, title='book %s' % i)
+        # load the URLconf, crud_for_app runs queries on import
+        reverse('testapp_book_list')
+
+    def get_view(self, **attrs):
+        crud_class = type(str('Test%s' % self.crud_class.__name__),
+                          (self.crud_class,), attrs)
+        return crud_class()
+
+    def get(self, view, action='list', data=None, method='get', path='/',
+            headers=None, **kwargs):
+        request = getattr(self.factory, method)(path, data or {},
+                                                **(headers or {}))
+        request.user = AnonymousUser()
+        request._dont_enforce_csrf_checks = True
+        response = getattr(view, action)(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+
+class TestListView(CRUDViewTestCase):
+
+    def test_foreign_keys_are_joined(self):
+        view = self.get_view()
+        with self.assertNumQueries(2):
+            response = self.get(view)
+        self.assertContains(response, self.author.name, count=2)
+
+    def test_row_urls(self):
+        response = self.get(self.get_view())
+        book = Book.objects.order_by('pk')[0]
+        self.assertContains(response, 'href="%s?"' % reverse(
+            'testapp_book_update', kwargs={'pk': book.pk}))
+
+    def test_only_list_fields_are_loaded(self):
+        view = self.get_view()
+        response = self.get(view)
+        book = response.context_data['object_list'][0]
+        self.assertEqual(book.get_deferred_fields(), {'summary'})
+
+        view = self.get_view(list_only_fields=False)
+        response = self.get(view)
+        book = response.context_data['object_list'][0]
+        self.assertEqual(book.get_deferred_fields(), set())
+
+    def test_keyset_pagination(self):
+        view = self.get_view(pagination_mode='keyset')
+        response = self.get(view, data={'q': 'book'})
+        first = list(response.context_data['object_list'])
+        self.assertEqual(len(first), 2)
+        self.assertContains(response, '?q=book&amp;after=%s' % first[-1].pk)
+
+        response = self.get(view, data={'q': 'book', 'after': first[-1].pk})
+        self.assertEqual(
+            [book.pk for book in response.context_data['object_list']],
+            [first[-1].pk + 1, first[-1].pk + 2])
+
+    def test_search_backend(self):
+        view = self.get_view(search_backend='sqlite_fts5')
+        Book.objects.create(author=self.author, title='other')
+        view.get_search_backend().rebuild_index()
+        response = self.get(view, data={'q': 'book'})
+        self.assertEqual(response.context_data['paginator'].count, 5)
+        self.assertEqual(len(response.context_data['object_list']), 2)
+
+    def test_list_cache(self):
+        view = self.get_view(list_cache_timeout=60)
+        with self.assertNumQueries(2):
+            self.get(view, data={'q': 'book'})
+        with self.assertNumQueries(1):
+            response = self.get(view, data={'q': 'book'})
+        self.assertEqual(response.context_data['paginator'].count, 5)
+        self.assertEqual(
+            [book.title for book in response.context_data['object_list']],
+            ['book 0', 'book 1'])
+
+        Book.objects.filter(title='book 0').get().delete()
+        with self.assertNumQueries(2):
+            response = self.get(view, data={'q': 'book'})
+        self.assertEqual(response.context_data['paginator'].count, 4)
+
+        with self.assertNumQueries(2):
+            self.get(view, data={'q': 'book', 'page': 2})
+
+    def test_list_cache_is_per_view(self):
+        other = Author.objects.create(name='Bar')
+        Book.objects.create(author=other, title='book 5')
+
+        class ScopedCRUD(BookCRUD):
+            list_cache_timeout = 60
+            paginate_by = 10
+
+            def get_list_view(self):
+                ListView = super(ScopedCRUD, self).get_list_view()
+
+                class ScopedListView(ListView):
+                    def get_queryset(self):
+                        queryset = super(ScopedListView, self).get_queryset()
+                        return queryset.filter(author__name='Foo')
+                return ScopedListView
+
+        view = self.get_view(list_cache_timeout=60, paginate_by=10)
+        response = self.get(view)
+        self.assertEqual(len(response.context_data['object_list']), 6)
+        for attempt in range(2):
+            response = self.get(ScopedCRUD())
+            self.assertEqual(response.context_data['paginator'].count, 5)
+            self.assertNotContains(response, 'book 5')
+
+        # nor between paths (namespaces, inline lists of other objects)
+        with self.assertNumQueries(2):
+            self.get(view, path='/other/')
+        with self.assertNumQueries(1):
+            self.get(view, path='/other/')
+
+    def test_export(self):
+        view = self.get_view(views_available=['list', 'export'],
+                             list_fields=['title', 'author', 'author__name',
+                                          'author__books'])
+        response = self.get(view, 'export', data={'q': 'book 1'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode('utf-8'),
+            'Title,Author,Name\r\nbook 1,%s,Foo\r\n' % self.author.pk)
+
+        response = self.get(view, 'export', data={'format': 'jsonl'})
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0].decode('utf-8')), {
+            'title': 'book 0', 'author': self.author.pk,
+            'author__name': 'Foo'})
+
+        response = self.get(view, 'export', data={'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_actions(self):
+        view = self.get_view(list_actions=[
+            'delete', BulkUpdateAction('rename', 'Rename', title='renamed')])
+        response = self.get(view)
+        self.assertContains(response, 'name="pks"', count=2)
+        self.assertContains(response, 'value="rename"')
+
+        books = list(Book.objects.all())
+        response = self.get(view, method='post', data={
+            'action': 'rename', 'pks': [books[0].pk, books[1].pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Book.objects.filter(title='renamed').count(), 2)
+
+        # rows out of the searched list are not touched
+        response = self.get(view, method='post', path='/?q=book', data={
+            'action': 'delete', 'pks': [books[1].pk, books[2].pk]})
+        self.assertEqual(response['Location'], '/?q=book')
+        self.assertEqual(Book.objects.count(), 4)
+
+        response = self.get(view, method='post', data={
+            'action': 'nothing', 'pks': [books[3].pk]})
+        self.assertEqual(response.status_code, 400)
+        response = self.get(view, method='post', data={
+            'action': 'delete', 'pks': ['x']})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_actions_need_their_view(self):
+        view = self.get_view(views_available=['list', 'update'],
+                             list_actions=['delete'])
+        response = self.get(view)
+        self.assertNotContains(response, 'name="pks"')
+        book = Book.objects.all()[0]
+        response = self.get(view, method='post', data={
+            'action': 'delete', 'pks': [book.pk]})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Book.objects.filter(pk=book.pk).exists())
+
+        # no perms entry for the action, no way to check it
+        view = self.get_view(views_available=['list', 'export'])
+        ListView = view.get_list_view()
+        list_view = ListView(request=self.factory.get('/'))
+        list_view.check_perms = True
+        action = BulkUpdateAction('rename', permission='export',
+                                  title='renamed')
+        self.assertFalse(action.has_perm(list_view, AnonymousUser()))
+
+    def test_datatables(self):
+        view = self.get_view(list_datatables=True)
+        response = self.get(view)
+        self.assertContains(response, '_datatables')
+
+        response = self.get(view, data={
+            '_datatables': 1, 'draw': 3, 'start': 1, 'length': 2,
+            'search[value]': 'book', 'columns[0][data]': 'title',
+            'order[0][column]': 0, 'order[0][dir]': 'desc'})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['draw'], 3)
+        self.assertEqual(data['recordsTotal'], 5)
+        self.assertEqual(data['recordsFiltered'], 5)
+        self.assertEqual([row['title'] for row in data['data']],
+                         ['book 3', 'book 2'])
+        self.assertIn('>Foo<', '>%s<' % data['data'][0]['author'])
+        self.assertIn('actions', data['data'][0])
+
+        response = self.get(view, data={
+            '_datatables': 1, 'search[value]': 'book 1'})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['recordsTotal'], 5)
+        self.assertEqual(data['recordsFiltered'], 1)
+
+        response = self.get(view, data={'_datatables': 1, 'start': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_datatables_total_is_scoped(self):
+        other = Author.objects.create(name='Bar')
+        Book.objects.create(author=other, title='book 5')
+
+        class ScopedCRUD(BookCRUD):
+            list_datatables = True
+
+            def get_list_view(self):
+                ListView = super(ScopedCRUD, self).get_list_view()
+
+                class ScopedListView(ListView):
+                    def get_queryset(self):
+                        queryset = super(ScopedListView, self).get_queryset()
+                        return queryset.filter(author__name='Foo')
+                return ScopedListView
+
+        view = ScopedCRUD()
+        with self.assertNumQueries(2):
+            response = self.get(view, data={'_datatables': 1})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['recordsTotal'], 5)
+        response = self.get(view, data={
+            '_datatables': 1, 'search[value]': 'book 1'})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['recordsTotal'], 5)
+        self.assertEqual(data['recordsFiltered'], 1)
+
+    def test_datatables_keyset(self):
+        view = self.get_view(list_datatables=True, pagination_mode='keyset')
+        response = self.get(view)
+        self.assertContains(response, '_datatables')
+        self.assertNotContains(response, 'deferLoading')
+
+    def test_sorting(self):
+        view = self.get_view(paginate_by=None)
+        response = self.get(view, data={'o': '-title'})
+        self.assertEqual([book.title for book in
+                          response.context_data['object_list']],
+                         ['book 4', 'book 3', 'book 2', 'book 1', 'book 0'])
+        self.assertEqual(response.context_data['object_list'].query.order_by,
+                         ('-title', '-pk'))
+        self.assertContains(response, 'href="?o=title"')
+        self.assertContains(response, 'fa-sort-desc')
+
+        # unknown fields are ignored
+        response = self.get(view, data={'o': 'summary'})
+        self.assertEqual(response.context_data['object_list'][0].title,
+                         'book 0')
+
+        # title has no index, refused over the limit
+        view = self.get_view(paginate_by=None, unindexed_sort_limit=3)
+        response = self.get(view, data={'o': '-title'})
+        self.assertEqual(response.context_data['object_list'][0].title,
+                         'book 0')
+        response = self.get(view, data={'o': '-author'})
+        self.assertEqual(response.context_data['object_list'].query.order_by,
+                         ('-author', '-pk'))
+
+    def test_row_cache(self):
+        view = self.get_view(row_cache_timeout=60)
+        self.get(view)
+        book = Book.objects.order_by('pk')[0]
+        # rows are rendered from the cache, changes through the ORM evict
+        # the row
+        Book.objects.filter(pk=book.pk).update(title='renamed')
+        response = self.get(view)
+        self.assertContains(response, 'book 0')
+        book.refresh_from_db()
+        book.title = 'saved'
+        book.save()
+        response = self.get(view)
+        self.assertContains(response, 'saved')
+        self.assertNotContains(response, 'book 0')
+
+        # related objects rendered in the row
+        self.author.name = 'Bar'
+        self.author.save()
+        response = self.get(view)
+        self.assertContains(response, 'Bar', count=2)
+
+    def test_column_renderers(self):
+        view = self.get_view()
+        response = self.get(view)
+        self.assertContains(response, 'book 0')
+
+        columns.register_column('CharField', lambda obj, field, context:
+                                '[%s]' % getattr(obj, field))
+        try:
+            response = self.get(view)
+        finally:
+            del columns.COLUMN_RENDERERS['charfield']
+        self.assertContains(response, '[book 0]')
+
+    @override_settings(TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {'loaders': [
+            ('django.template.loaders.locmem.Loader', {
+                'cruds/columns/charfield.html': '<b>{{ object.title }}</b>',
+            }),
+            'django.template.loaders.app_directories.Loader',
+        ]},
+    }])
+    def test_column_templates_win(self):
+        response = self.get(self.get_view())
+        self.assertContains(response, '<b>book 0</b>')
+
+    def test_deferred_count(self):
+        view = self.get_view(count_strategy='deferred')
+        with self.assertNumQueries(1):
+            response = self.get(view)
+        self.assertContains(response, 'data-count-url="/?_count=1"')
+
+        # the counters are filled by cruds.js, the page has no count script
+        view = self.get_view(count_strategy='deferred',
+                             paginate_position='Both')
+        response = self.get(view)
+        self.assertContains(response, 'data-count-url="/?_count=1"', count=2)
+        self.assertNotContains(response, 'getJSON')
+
+        response = self.get(view, data={'_count': 1, 'q': 'book 1'})
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['count'],
+                         1)
+
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+
+@skipIf(jinja2 is None, 'Jinja2 is not installed')
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'APP_DIRS': True,
+    'OPTIONS': {'environment': 'cruds_adminlte.jinja.environment'},
+}, {
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'APP_DIRS': True,
+    'OPTIONS': {'context_processors': [
+        'django.template.context_processors.request',
+    ]},
+}])
+class TestJinja2Templates(CRUDViewTestCase):
+
+    def test_list(self):
+        view = self.get_view(template_engine='jinja2', row_cache_timeout=60)
+        for i in range(2):
+            response = self.get(view)
+            self.assertContains(response, 'book 1')
+            self.assertContains(response, 'href="%s?"' % reverse(
+                'testapp_book_update',
+                kwargs={'pk': Book.objects.order_by('pk')[0].pk}))
+            self.assertContains(response, '?o=title')
+            self.assertContains(response, '?page=2')
+
+    def test_streaming(self):
+        view = self.get_view(template_engine='jinja2', list_streaming=True,
+                             streaming_chunk_size=1)
+        response = self.get(view)
+        parts = list(response.streaming_content)
+        self.assertEqual(len(parts), 4)
+        self.assertIn(b'book 1', parts[2])
+
+    def test_detail(self):
+        book = Book.objects.order_by('pk')[0]
+        response = self.get(self.get_view(template_engine='jinja2'),
+                            'detail', pk=book.pk)
+        self.assertContains(response, 'book 0')
+        self.assertContains(response, reverse(
+            'testapp_author_update', kwargs={'pk': self.author.pk}))
+
+
+class TestStreamingList(CRUDViewTestCase):
+
+    def test_rows_are_streamed_in_chunks(self):
+        view = self.get_view(list_streaming=True, streaming_chunk_size=2,
+                             paginate_by=None, row_cache_timeout=60)
+        # the second time rows come from the row cache
+        for attempt in range(2):
+            response = self.get(view)
+            self.assertTrue(response.streaming)
+            parts = [part.decode('utf-8')
+                     for part in response.streaming_content]
+            # head, three chunks of rows and the rest of the page
+            self.assertEqual(len(parts), 5)
+            self.assertIn('<thead>', parts[0])
+            self.assertIn('</html>', parts[-1])
+            for i in range(5):
+                self.assertIn('book %s' % i, parts[1 + i // 2])
+                self.assertIn(self.author.name, parts[1 + i // 2])
+
+    def test_empty_list(self):
+        Book.objects.all().delete()
+        response = self.get(self.get_view(list_streaming=True))
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('No items yet.', content)
+
+    @override_settings(TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {'loaders': [
+            ('django.template.loaders.locmem.Loader', {
+                'testapp/book/cruds/list_rows.html':
+                    '{% extends "cruds/list_rows.html" %}'
+                    '{% block actions %}[row {{ object.title }}]{% endblock %}',
+            }),
+            'django.template.loaders.app_directories.Loader',
+        ]},
+    }])
+    def test_rows_template_is_shared(self):
+        response = self.get(self.get_view())
+        self.assertContains(response, '[row book 0]')
+        response = self.get(self.get_view(list_streaming=True))
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertIn('[row book 0]', content)
+
+
+class TestConditionalGet(CRUDViewTestCase):
+
+    def assertNotModified(self, view, action='list', **kwargs):
+        response = self.get(view, action, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        etag = response['ETag']
+        response = self.get(view, action, headers={
+            'HTTP_IF_NONE_MATCH': etag}, **kwargs)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def test_list(self):
+        view = self.get_view(conditional_get=True)
+        etag = self.assertNotModified(view)
+        response = self.get(view, data={'page': 2}, headers={
+            'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 200)
+
+        # the author is shown in the rows
+        self.author.name = 'Bar'
+        self.author.save()
+        response = self.get(view, headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Bar')
+
+    def test_list_actions(self):
+        view = self.get_view(conditional_get=True, list_actions=[
+            BulkUpdateAction('rename', 'Rename', title='renamed')])
+        book = Book.objects.order_by('pk')[0]
+        list_etag = self.assertNotModified(view)
+        detail_etag = self.assertNotModified(view, 'detail', pk=book.pk)
+        self.get(view, method='post', data={
+            'action': 'rename', 'pks': [book.pk]})
+
+        response = self.get(view, headers={'HTTP_IF_NONE_MATCH': list_etag})
+        self.assertContains(response, 'renamed')
+        response = self.get(view, 'detail', pk=book.pk, headers={
+            'HTTP_IF_NONE_MATCH': detail_etag})
+        self.assertContains(response, 'renamed')
+
+    def test_detail(self):
+        view = self.get_view(conditional_get=True)
+        book = Book.objects.order_by('pk')[0]
+        etag = self.assertNotModified(view, 'detail', pk=book.pk)
+        # other books do not change the page
+        Book.objects.order_by('pk')[1].save()
+        response = self.get(view, 'detail', pk=book.pk, headers={
+            'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(response.status_code, 304)
+        book.title = 'Baz'
+        book.save()
+        response = self.get(view, 'detail', pk=book.pk, headers={
+            'HTTP_IF_NONE_MATCH': etag})
+        self.assertContains(response, 'Baz')
+
+
+class TestPerms(CRUDViewTestCase):
+
+    def test_object_is_loaded_once(self):
+        user = User.objects.create_user('foo')
+        user.user_permissions.add(*Permission.objects.filter(
+            content_type__app_label='testapp',
+            codename__in=['change_book', 'view_book']))
+        view = self.get_view(check_perms=True, update_form=modelform_factory(
+            Book, fields=['title']))
+        book = Book.objects.order_by('pk')[0]
+        request = self.factory.get('/')
+        request.user = user
+        with CaptureQueriesContext(connection) as queries:
+            response = view.update(request, pk=book.pk)
+            perms = response.context_data['crud_perms']
+            self.assertTrue(perms['update'])
+            self.assertTrue(perms['detail'])
+            self.assertFalse(perms['delete'])
+        book_queries = [query for query in queries
+                        if 'FROM "testapp_book"' in query['sql']]
+        self.assertEqual(len(book_queries), 1)
+
+
+class AuthorCRUD(CRUDView):
+    model = Author
+    check_login = False
+    check_perms = False
+    list_fields = ['name']
+    search_fields = ['name__icontains', 'books__title__icontains']
+
+
+class TestRelatedSearch(CRUDViewTestCase):
+    crud_class = AuthorCRUD
+
+    def test_multi_valued_search_does_not_repeat_rows(self):
+        Author.objects.create(name='Bar')
+        view = self.get_view()
+        response = self.get(view, data={'q': 'book'})
+        self.assertEqual(list(response.context_data['object_list']),
+                         [self.author])
+        self.assertNotIn('JOIN', str(response.context_data['object_list']
+                                     .query))
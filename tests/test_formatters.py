@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models
+from django.test.testcases import TestCase
+from django.urls import reverse
+
+from cruds_adminlte import formatters
+from cruds_adminlte.templatetags.crud_tags import format_value
+
+from tests.testapp.models import (
+    Author,
+    Book,
+)
+
+
+class TestFormatters(TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name='Foo')
+        self.book = Book.objects.create(author=self.author, title='Bar')
+        # load the URLconf, crud_for_app runs queries on import
+        reverse('testapp_book_list')
+
+    def tearDown(self):
+        formatters.FORMATTERS.clear()
+        formatters._formatters.clear()
+
+    def test_format_value(self):
+        self.assertEqual(format_value(self.book, 'title'), 'Bar')
+        self.assertEqual(format_value(self.book, 'summary'), '')
+        self.assertEqual(format_value(self.book, 'author__name'), 'Foo')
+        self.assertEqual(
+            format_value(self.book, 'author'), '<a href="%s">Foo</a>' % (
+                reverse('testapp_author_update',
+                        kwargs={'pk': self.author.pk})))
+
+    def test_formatter_is_built_once(self):
+        formatter = formatters.get_formatter(Book, 'title')
+        self.assertIs(formatters.get_formatter(Book, 'title'), formatter)
+
+    def test_register_formatter(self):
+        self.assertEqual(format_value(self.book, 'title'), 'Bar')
+        formatters.register_formatter(models.CharField,
+                                      lambda value: value.upper())
+        self.assertEqual(format_value(self.book, 'title'), 'BAR')
+        self.assertEqual(format_value(self.book, 'author__name'), 'FOO')
+        formatters.register_formatter((Book, 'author__name'),
+                                      lambda value: value.lower())
+        self.assertEqual(format_value(self.book, 'author__name'), 'foo')
+        self.assertEqual(format_value(self.author, 'name'), 'FOO')
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test.testcases import TestCase
+from django.utils.timezone import now
+
+from cruds_adminlte.pagination import (KeysetPaginator,
+                                       CountStrategyPaginator,
+                                       get_page_window)
+
+from tests.testapp.models import (
+    Author,
+)
+
+
+class TestKeysetPaginator(TestCase):
+
+    def setUp(self):
+        for name in 'edcba':
+            Author.objects.create(name=name)
+        self.queryset = Author.objects.order_by('name')
+
+    def test_pages(self):
+        paginator = KeysetPaginator(self.queryset, 2)
+        page = paginator.page()
+        self.assertEqual([a.name for a in page], ['a', 'b'])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+        page = paginator.page(after=page.next_cursor)
+        self.assertEqual([a.name for a in page], ['c', 'd'])
+        self.assertTrue(page.has_previous())
+
+        last = paginator.page(after=page.next_cursor)
+        self.assertEqual([a.name for a in last], ['e'])
+        self.assertFalse(last.has_next())
+
+        page = paginator.page(before=last.previous_cursor)
+        self.assertEqual([a.name for a in page], ['c', 'd'])
+        self.assertTrue(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_unknown_cursor(self):
+        paginator = KeysetPaginator(self.queryset, 2)
+        page = paginator.page(after='missing')
+        self.assertEqual([a.name for a in page], ['a', 'b'])
+        self.assertFalse(page.has_previous())
+
+    def test_nullable_ordering(self):
+        users = [User.objects.create(username=name) for name in 'abcde']
+        for user in users[1::2]:
+            user.last_login = now()
+            user.save()
+        # NULL is the greatest value, pk breaks ties in the same direction
+        for ordering, expected in (('last_login', ['b', 'd', 'a', 'c', 'e']),
+                                   ('-last_login', ['e', 'c', 'a', 'd', 'b'])):
+            paginator = KeysetPaginator(
+                User.objects.order_by(ordering), 2)
+            page = paginator.page()
+            seen = [user.username for user in page]
+            while page.has_next():
+                page = paginator.page(after=page.next_cursor)
+                seen += [user.username for user in page]
+            self.assertEqual(seen, expected)
+
+            page = paginator.page(before=page.previous_cursor)
+            self.assertEqual([user.username for user in page],
+                             expected[2:4])
+
+
+class TestCountStrategyPaginator(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for name in 'edcba':
+            Author.objects.create(name=name)
+        self.queryset = Author.objects.order_by('name')
+
+    def test_capped(self):
+        paginator = CountStrategyPaginator(self.queryset, 2, strategy='capped',
+                                           cap=3, cache_timeout=30)
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.capped)
+        self.assertEqual(paginator.count_display, '3+')
+
+        Author.objects.create(name='f')
+        paginator = CountStrategyPaginator(self.queryset, 2, strategy='capped',
+                                           cap=10, cache_timeout=30)
+        self.assertEqual(paginator.count, 6)
+        self.assertFalse(paginator.capped)
+
+    def test_cached(self):
+        paginator = CountStrategyPaginator(self.queryset, 2, strategy='capped',
+                                           cache_timeout=30)
+        self.assertEqual(paginator.count, 5)
+        Author.objects.create(name='f')
+        paginator = CountStrategyPaginator(self.queryset, 2, strategy='capped',
+                                           cache_timeout=30)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 5)
+
+    def test_estimated_falls_back_to_exact(self):
+        paginator = CountStrategyPaginator(self.queryset, 2,
+                                           strategy='estimated')
+        self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.estimated)
+
+    def test_deferred(self):
+        paginator = CountStrategyPaginator(self.queryset, 2,
+                                           strategy='deferred')
+        with self.assertNumQueries(1):
+            page = paginator.page(3)
+        self.assertEqual([a.name for a in page], ['e'])
+        self.assertFalse(page.has_next())
+        self.assertTrue(paginator.page(2).has_next())
+
+
+class TestPageWindow(TestCase):
+
+    def get_window(self, number, count=1000000, **kwargs):
+        page = Paginator(range(count), 10).page(number)
+        return get_page_window(page, **kwargs)
+
+    def test_window(self):
+        self.assertEqual(self.get_window(1), [1, 2, 3, 4, None, 100000])
+        self.assertEqual(self.get_window(500),
+                         [1, None, 497, 498, 499, 500, 501, 502, 503, None,
+                          100000])
+        self.assertEqual(self.get_window(100000, on_each_side=1),
+                         [1, None, 99999, 100000])
+
+    def test_small_gaps_are_not_elided(self):
+        self.assertEqual(self.get_window(5, count=100),
+                         [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
+
+    def test_deferred(self):
+        paginator = CountStrategyPaginator(range(100), 10,
+                                           strategy='deferred')
+        self.assertEqual(get_page_window(paginator.page(6), on_each_side=1),
+                         [1, None, 5, 6, 7])
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.management import call_command
+from django.test.testcases import TestCase
+from six import StringIO
+
+from cruds_adminlte.search import (ORMSearchBackend,
+                                   SQLiteFTS5SearchBackend,
+                                   SearchTerm,
+                                   get_search_backend,
+                                   parse_search)
+
+from tests.testapp.models import (
+    Author,
+    Book,
+)
+
+
+class TestSQLiteFTS5SearchBackend(TestCase):
+
+    def setUp(self):
+        self.backend = get_search_backend(
+            'sqlite_fts5', Book,
+            ['title__icontains', 'summary', 'author__name__icontains'])
+        self.author = Author.objects.create(name='Ursula')
+        self.books = [
+            Book.objects.create(author=self.author, title='The Dispossessed',
+                                summary='An ambiguous utopia'),
+            Book.objects.create(author=self.author, title='The Lathe',
+                                summary='Dreams change the world'),
+        ]
+        self.backend.rebuild_index()
+
+    def search(self, text):
+        fields = self.backend.search_fields
+        return self.backend.search(
+            Book.objects.all(), fields, parse_search(text, ' ', fields))
+
+    def test_fields(self):
+        self.assertIsInstance(self.backend, SQLiteFTS5SearchBackend)
+        self.assertEqual(self.backend.index_fields, ['title', 'summary'])
+        self.assertEqual(self.backend.orm_fields, ['author__name__icontains'])
+
+    def test_search(self):
+        self.assertEqual(list(self.search('utop')), self.books[:1])
+        self.assertEqual(list(self.search('the world')), self.books[1:])
+        self.assertEqual(list(self.search('ursula')), self.books)
+        self.assertEqual(list(self.search('"quoted')), [])
+        self.assertEqual(list(self.search('ursula dreams')), self.books[1:])
+        self.assertEqual(list(self.search('title:lathe')), self.books[1:])
+        self.assertEqual(list(self.search('summary:lathe')), [])
+
+    def test_index_follows_changes(self):
+        self.books[0].title = 'Left hand'
+        self.books[0].save()
+        self.assertEqual(list(self.search('left')), self.books[:1])
+        self.books[0].delete()
+        self.assertEqual(list(self.search('left')), [])
+
+    def test_missing_index(self):
+        self.backend.drop_index()
+        self.books[0].save()
+        self.assertFalse(self.backend.index_exists(
+            self.backend.get_connection()))
+        # searched with the orm lookups, rows are still found
+        with self.assertNumQueries(2):
+            self.assertEqual(list(self.search('utopia')), self.books[:1])
+
+        self.backend.create_index()
+        self.assertEqual(list(self.search('utopia')), self.books[:1])
+        self.assertFalse(self.backend.is_ready(self.backend.get_connection()))
+
+    def test_rebuild_command(self):
+        self.backend.drop_index()
+        out = StringIO()
+        call_command('cruds_search_index', 'testapp.book', stdout=out)
+        self.assertIn(self.backend.index_name, out.getvalue())
+        self.assertEqual(list(self.search('dreams')), self.books[1:])
+
+    def test_orm_backend(self):
+        fields = ['title__icontains', 'summary']
+        backend = get_search_backend('orm', Book, fields)
+        self.assertIsInstance(backend, ORMSearchBackend)
+
+        def search(text):
+            return list(backend.search(Book.objects.all(), fields,
+                                       parse_search(text, ' ', fields)))
+
+        self.assertEqual(search('lathe'), self.books[1:])
+        self.assertEqual(search('lathe dreams'), self.books[1:])
+        self.assertEqual(search('lathe nothing'), [])
+        self.assertEqual(search('"an ambiguous"'), self.books[:1])
+
+
+class TestSearchCompiler(TestCase):
+
+    def test_parse_search(self):
+        fields = ['title__icontains', 'author__name']
+        self.assertEqual(
+            parse_search(' a "b c" A title:d author:"e f" x:y ', ' ', fields),
+            [SearchTerm('a'), SearchTerm('b c'), SearchTerm('d', 'title'),
+             SearchTerm('e f', 'author'), SearchTerm('x:y')])
+        self.assertEqual(parse_search('a b', None, fields),
+                         [SearchTerm('a b')])
+        self.assertEqual(parse_search('a, title: b ,a', ',', fields),
+                         [SearchTerm('a'), SearchTerm('b', 'title')])
+        self.assertEqual(parse_search('  ', ' ', fields), [])
+
+    def test_lookups(self):
+        backend = ORMSearchBackend(Book, [])
+        self.assertEqual(backend.get_lookup('title', 'a'),
+                         ('title__icontains', 'a'))
+        self.assertEqual(backend.get_lookup('summary', 'a'),
+                         ('summary__icontains', 'a'))
+        self.assertEqual(backend.get_lookup('title__iexact', 'a'),
+                         ('title__iexact', 'a'))
+        self.assertEqual(backend.get_lookup('pk', '3'), ('pk__exact', 3))
+        self.assertEqual(backend.get_lookup('author', '3'),
+                         ('author__pk__exact', 3))
+        self.assertIsNone(backend.get_lookup('author', 'a'))
+        self.assertEqual(ORMSearchBackend(Author, []).get_lookup('books', '3'),
+                         ('books__pk__exact', 3))
+        backend.short_field_length = 100
+        self.assertEqual(backend.get_lookup('author__name', 'a'),
+                         ('author__name__istartswith', 'a'))
+        self.assertIsNone(backend.get_lookup('pk', 'a'))
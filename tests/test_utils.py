@@ -1,17 +1,113 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+from django.test import override_settings
 from django.test.testcases import TestCase
 
-from cruds_adminlte.utils import get_fields
+from django.urls import reverse, re_path
+from django.views.generic import View
+
+from cruds_adminlte.utils import (get_fields, get_related_lookups,
+                                   get_only_fields, get_lookup_filter,
+                                   get_url_templates, reverse_instance_url,
+                                   reverse_url)
+from cruds_adminlte.templatetags.crud_tags import crud_url
 
 from tests.testapp.models import (
     Author,
+    Book,
 )
 
+# urls whose pk the placeholder does not match, like slug or uuid ones
+urlpatterns = [
+    re_path(r'^book/(?P<pk>[a-z]+)/$', View.as_view(),
+            name='testapp_book_update'),
+]
+
 
 class TestUtils(TestCase):
 
     def test_get_fields_order(self):
         res = get_fields(Author, ('birthday', 'name'))
         self.assertEqual(list(res.keys())[0], 'birthday')
+
+    def test_get_related_lookups(self):
+        res = get_related_lookups(Book, ('title', 'author', 'author__name'))
+        self.assertEqual(res, (['author'], []))
+        res = get_related_lookups(Author, ('name', 'books__title'))
+        self.assertEqual(res, ([], ['books']))
+
+    def test_get_related_lookups_default_fields(self):
+        self.assertEqual(get_related_lookups(Book), (['author'], []))
+        self.assertEqual(get_related_lookups(Author), ([], []))
+
+    def test_get_only_fields(self):
+        res = get_only_fields(Book, ('title', 'author__name'), ('-summary',))
+        self.assertEqual(res, ['id', 'summary', 'title', 'author__name'])
+        res = get_only_fields(Book, ('author__name', 'author'))
+        self.assertEqual(res, ['id', 'author'])
+        res = get_only_fields(Author, ('name', 'books__title'))
+        self.assertEqual(res, ['id', 'name'])
+
+    def test_get_lookup_filter(self):
+        foo = Author.objects.create(name='Foo')
+        bar = Author.objects.create(name='Bar')
+        books = [Book.objects.create(author=foo, title='book %s' % i)
+                 for i in range(2)]
+
+        def authors(lookup, value):
+            return list(Author.objects.filter(
+                get_lookup_filter(Author, lookup, value)).order_by('pk'))
+
+        self.assertEqual(authors('books__title__icontains', 'book'), [foo])
+        self.assertEqual(authors('books', books[0]), [foo])
+        self.assertEqual(authors('books__in', books), [foo])
+        self.assertEqual(authors('books__pk', books[1].pk), [foo])
+        self.assertEqual(authors('name', 'Bar'), [bar])
+
+        # NULL lookups match authors without books, like the plain join
+        nobooks = Author.objects.create(name='NoBooks')
+        Book.objects.create(author=bar, title='')
+        self.assertEqual(authors('books__isnull', True), [nobooks])
+        self.assertEqual(authors('books', None), [nobooks])
+        self.assertEqual(authors('books__title__isnull', True), [nobooks])
+        self.assertEqual(authors('books__isnull', False), [foo, bar])
+        for lookup, value in (('books__isnull', True), ('books', None),
+                              ('books__title__isnull', True),
+                              ('books__isnull', False)):
+            self.assertEqual(
+                authors(lookup, value),
+                list(Author.objects.filter(**{lookup: value}).distinct()
+                     .order_by('pk')))
+
+        condition = get_lookup_filter(Book, 'author__name', 'Foo')
+        self.assertEqual(condition.children, [('author__name', 'Foo')])
+        query = str(Author.objects.filter(
+            get_lookup_filter(Author, 'books__title', 'x')).query)
+        self.assertNotIn('JOIN', query)
+
+    def test_get_url_templates(self):
+        templates = get_url_templates(Book, ('detail', 'update', 'nothing'))
+        self.assertEqual(templates['update'].format(12),
+                         reverse('testapp_book_update', kwargs={'pk': 12}))
+        self.assertEqual(templates['detail'].format('a b'),
+                         reverse('testapp_book_detail',
+                                 kwargs={'pk': 'a b'}))
+        self.assertIsNone(templates['nothing'])
+
+    @override_settings(ROOT_URLCONF='tests.test_utils')
+    def test_reverse_instance_url_without_template(self):
+        self.assertIsNone(get_url_templates(Book, ('update',))['update'])
+        self.assertEqual(reverse_instance_url('testapp_book_update', 'abc'),
+                         '/book/abc/')
+        self.assertIsNone(reverse_instance_url('testapp_book_update', 12))
+        self.assertIsNone(reverse_instance_url('testapp_book_detail', 'abc'))
+        self.assertEqual(crud_url(Book(pk='abc'), 'update'), '/book/abc/')
+
+    def test_reverse_url_is_cleared_with_urlconf(self):
+        url = reverse('testapp_book_list')
+        self.assertEqual(reverse_url('testapp_book_list'), url)
+        self.assertIsNone(reverse_url('testapp_book_nothing'))
+        with override_settings(ROOT_URLCONF='django_select2.urls'):
+            self.assertIsNone(reverse_url('testapp_book_list'))
+        self.assertEqual(reverse_url('testapp_book_list'), url)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django import forms
+from django.test import SimpleTestCase
+
+from cruds_adminlte.widgets import (CKEditorWidget, ColorPickerWidget,
+                                    DatePickerWidget)
+
+
+class WidgetsForm(forms.Form):
+    start = forms.DateField(widget=DatePickerWidget)
+    end = forms.DateField(widget=DatePickerWidget)
+    color = forms.CharField(widget=ColorPickerWidget)
+    text = forms.CharField(widget=CKEditorWidget(attrs={'lang': 'es'}))
+
+
+class TestWidgets(SimpleTestCase):
+
+    def test_assets_are_included_once(self):
+        form = WidgetsForm()
+        js = str(form.media['js'])
+        self.assertEqual(js.count('js/widgets.js'), 1)
+        self.assertLess(js.index('ckeditor/ckeditor.js'),
+                        js.index('js/widgets.js'))
+        self.assertIn('bootstrap-colorpicker.min.css',
+                      str(form.media['css']))
+
+    def test_render(self):
+        html = str(WidgetsForm())
+        self.assertNotIn('<script', html)
+        self.assertEqual(html.count('data-cruds-widget="datepicker"'), 2)
+        self.assertIn('data-cruds-widget="colorpicker"', html)
+        self.assertIn('data-lang="es"', html)
@@ -12,3 +12,17 @@ class Author(models.Model):
 
     def __str__(self):
         return self.name
+
+
+@python_2_unicode_compatible
+class Book(models.Model):
+    author = models.ForeignKey(Author, related_name='books',
+                               on_delete=models.CASCADE)
+    title = models.CharField(max_length=100)
+    summary = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('pk',)
+
+    def __str__(self):
+        return self.title